@@ -1,23 +1,686 @@
+import time
+
+# Taken before the other imports so "armed after launch" includes their cost
+STARTED_AT = time.perf_counter()
+
 import os
 import sys
 import json
 import random
-import tkinter as tk
-from tkinter import filedialog, ttk, scrolledtext
+import shutil
+import tempfile
+import signal
+import argparse
+import atexit
+import re
 from watchdog.observers import Observer
-from watchdog.events import FileSystemEventHandler
+from watchdog.events import FileSystemEventHandler, FileCreatedEvent, FileModifiedEvent
 import ctypes
+import collections
+import hashlib
+import heapq
+import itertools
+import logging
+import logging.handlers
+import queue
+import sqlite3
 import threading
-import time
+from concurrent.futures import ThreadPoolExecutor
 
-# Function to change wallpaper via Windows API
-def set_wallpaper(image_path):
-    print(f"Attempting to change wallpaper to: {image_path}")
-    if os.path.exists(image_path):
-        ctypes.windll.user32.SystemParametersInfoW(20, 0, image_path, 3)
-        print(f"Wallpaper changed to: {image_path}")
-    else:
-        print(f"Wallpaper file not found: {image_path}")
+# tkinter is only imported when the GUI is requested, so the daemon and replay
+# modes start faster and stay smaller
+tk = ttk = filedialog = scrolledtext = None
+
+def import_tkinter():
+    global tk, ttk, filedialog, scrolledtext
+    import tkinter as tk
+    from tkinter import filedialog, ttk, scrolledtext
+
+# asyncio and socket are only needed by the split feed, which is off by default
+asyncio = socket = None
+
+# Pillow is optional and only loaded once the wallpaper cache is enabled
+Image = ImageOps = None
+
+def import_pillow():
+    global Image, ImageOps
+    try:
+        from PIL import Image, ImageOps
+    except ImportError:
+        return False
+    return True
+
+def elapsed_since_launch_ms():
+    return (time.perf_counter() - STARTED_AT) * 1000
+
+# Primary display size, or None when it can't be determined without a GUI
+def screen_resolution():
+    if sys.platform == "win32":
+        # python.exe isn't DPI-aware, so GetSystemMetrics would report the
+        # scaled size (2560x1440 for 4K at 150%); the device caps are physical
+        DESKTOPVERTRES, DESKTOPHORZRES = 117, 118
+        user32, gdi32 = ctypes.windll.user32, ctypes.windll.gdi32
+        dc = user32.GetDC(None)
+        try:
+            return (gdi32.GetDeviceCaps(dc, DESKTOPHORZRES), gdi32.GetDeviceCaps(dc, DESKTOPVERTRES))
+        finally:
+            user32.ReleaseDC(None, dc)
+    return None
+
+# Wallpaper backends. apply() performs the actual desktop change and returns
+# whether it succeeded.
+class WindowsWallpaperBackend:
+    SPI_SETDESKWALLPAPER = 20
+    SPIF_UPDATEINIFILE_SENDCHANGE = 3
+
+    def apply(self, image_path):
+        return bool(ctypes.windll.user32.SystemParametersInfoW(self.SPI_SETDESKWALLPAPER, 0, image_path, self.SPIF_UPDATEINIFILE_SENDCHANGE))
+
+# Records every apply without touching the desktop, so the pipeline can run
+# and be timed on any platform.
+class RecordingWallpaperBackend:
+    def __init__(self):
+        self.applied = []  # (time.perf_counter(), image_path)
+
+    def apply(self, image_path):
+        self.applied.append((time.perf_counter(), image_path))
+        return True
+
+def default_wallpaper_backend():
+    if sys.platform == "win32":
+        return WindowsWallpaperBackend()
+    return RecordingWallpaperBackend()
+
+# On-disk cache of wallpapers pre-converted to BMP at display resolution, so
+# Windows doesn't have to decode and scale a JPG/PNG at split time. Entries are
+# keyed on source path, mtime and target resolution, and the least recently
+# used ones are evicted once the cache grows past max_bytes.
+class WallpaperCache:
+    def __init__(self, cache_dir="wallpaper_cache", resolution=None, max_bytes=256 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.resolution = resolution  # (width, height), or None to keep the source size
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="WallpaperCache")
+        self.hits = 0
+        self.misses = 0
+
+    def cached_path(self, image_path):
+        stat = os.stat(image_path)
+        width, height = self.resolution if self.resolution else (0, 0)
+        key = f"{os.path.abspath(image_path)}|{stat.st_mtime_ns}|{width}x{height}"
+        return os.path.join(self.cache_dir, hashlib.sha1(key.encode("utf-8")).hexdigest() + ".bmp")
+
+    # Returns the cached BMP for image_path, or None if it hasn't been converted yet
+    def lookup(self, image_path):
+        try:
+            path = self.cached_path(image_path)
+        except OSError:
+            return None
+        with self.lock:
+            if os.path.exists(path):
+                self.hits += 1
+                os.utime(path)  # Mark as recently used
+                return path
+            self.misses += 1
+        return None
+
+    def convert(self, image_path):
+        path = self.cached_path(image_path)
+        if os.path.exists(path):
+            return path
+        os.makedirs(self.cache_dir, exist_ok=True)
+        with Image.open(image_path) as image:
+            image = image.convert("RGB")
+            if self.resolution:
+                image = ImageOps.fit(image, self.resolution, Image.LANCZOS)
+            temp_path = path + ".tmp"
+            image.save(temp_path, "BMP")
+        os.replace(temp_path, path)
+        self.evict()
+        return path
+
+    # Convert images in the background; already cached ones are left alone
+    def prewarm(self, image_paths):
+        futures = []
+        for image_path in image_paths:
+            if image_path and os.path.exists(image_path) and not image_path.lower().endswith(".bmp"):
+                futures.append(self.executor.submit(self._prewarm_one, image_path))
+        if futures:
+            size = f"{self.resolution[0]}x{self.resolution[1]}" if self.resolution else "source size"
+            print(f"Caching {len(futures)} wallpapers at {size}...")
+        return futures
+
+    # Convert one image in the background without touching the disk here
+    def prewarm_later(self, image_path):
+        return self.executor.submit(self._prewarm_one, image_path)
+
+    def _prewarm_one(self, image_path):
+        try:
+            self.convert(image_path)
+        except Exception as e:
+            print(f"Error caching wallpaper {image_path}: {e}")
+
+    def evict(self):
+        with self.lock:
+            entries = []
+            for name in os.listdir(self.cache_dir):
+                if name.endswith(".bmp"):
+                    stat = os.stat(os.path.join(self.cache_dir, name))
+                    entries.append((stat.st_mtime, stat.st_size, name))
+            total = sum(size for _, size, _ in entries)
+            for _, size, name in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                os.remove(os.path.join(self.cache_dir, name))
+                total -= size
+
+    def stats(self):
+        return f"Wallpaper cache: {self.hits} hits, {self.misses} misses."
+
+def create_wallpaper_cache(max_mb, resolution=None):
+    if not import_pillow():
+        print("Pillow is not installed; wallpaper cache disabled.")
+        return None
+    return WallpaperCache(resolution=resolution, max_bytes=max_mb * 1024 * 1024)
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+
+# Image lists of the wallpaper folders, stored with each folder's mtime so
+# startup only stats a folder instead of listing and checking every file in it.
+# Adding, removing or renaming an image changes the folder's mtime, which
+# triggers a rescan of that folder alone.
+class WallpaperManifest:
+    def __init__(self, path="wallpaper_manifest.json"):
+        self.path = path
+        self.entries = {}  # folder -> {"mtime_ns": ..., "files": [...]}
+        self.dirty = False
+        try:
+            with open(path, "r") as file:
+                entries = json.load(file)
+            if isinstance(entries, dict):
+                self.entries = entries
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            print(f"Ignoring unreadable wallpaper manifest {path}: {e}")
+
+    def files(self, directory):
+        mtime_ns = os.stat(directory).st_mtime_ns
+        entry = self.entries.get(directory)
+        if entry is not None and entry.get("mtime_ns") == mtime_ns:
+            return entry["files"]
+        files = sorted(item.name for item in os.scandir(directory) if item.name.lower().endswith(IMAGE_EXTENSIONS) and item.is_file())
+        self.entries[directory] = {"mtime_ns": mtime_ns, "files": files}
+        self.dirty = True
+        print(f"Indexed {len(files)} wallpapers in {directory}")
+        return files
+
+    def save(self):
+        if not self.dirty:
+            return
+        temp_path = self.path + ".tmp"
+        try:
+            with open(temp_path, "w") as file:
+                json.dump(self.entries, file)
+            os.replace(temp_path, self.path)
+            self.dirty = False
+        except OSError as e:
+            print(f"Error saving wallpaper manifest: {e}")
+
+# The images of one wallpaper folder, handed out as a shuffle bag: each image
+# is shown once, in random order, before any repeats. The next pick is drawn
+# ahead of time, so picking at a split is a list pop.
+class WallpaperPool:
+    def __init__(self, directory, files):
+        self.directory = directory
+        self.files = files  # File names from the manifest
+        self.bag = []  # Indexes into files not drawn yet this round
+        self.last = None
+        self.upcoming = self._draw()  # Image the next pick() returns
+
+    def _draw(self):
+        if not self.files:
+            return ""
+        if not self.bag:
+            self.bag = list(range(len(self.files)))
+            random.shuffle(self.bag)
+            # Don't show the same image twice in a row across rounds
+            if len(self.bag) > 1 and self.bag[-1] == self.last:
+                self.bag[0], self.bag[-1] = self.bag[-1], self.bag[0]
+        self.last = self.bag.pop()
+        return os.path.join(self.directory, self.files[self.last])
+
+    def pick(self):
+        path, self.upcoming = self.upcoming, self._draw()
+        return path
+
+# Turns a wallpaper slot into an image path. A slot holds either an image or a
+# folder; folders become WallpaperPools when load() runs, so select() never
+# touches the disk. A split that is decided again keeps the image it got.
+# load() runs on the UI thread while select() runs on the split thread, so the
+# pools are swapped and drawn from under a lock.
+class WallpaperSelector:
+    def __init__(self, wallpapers, manifest=None, cache=None):
+        self.lock = threading.Lock()
+        self.wallpapers = wallpapers
+        self.manifest = manifest if manifest is not None else WallpaperManifest()
+        self.cache = cache  # Optional WallpaperCache; each pool's next pick is converted ahead
+        self.pools = {}  # Slot index -> WallpaperPool
+        self.current = (None, "")  # (slot index, image path) of the last select()
+
+    # Index the folders behind the slots; call again whenever wallpapers changes
+    def load(self):
+        with self.lock:
+            previous = dict(self.pools)
+            slots = dict(self.wallpapers)
+        pools = {}
+        for index, path in slots.items():
+            if not path or not os.path.isdir(path):
+                continue
+            directory = os.path.normpath(os.path.abspath(path))
+            try:
+                files = self.manifest.files(directory)
+            except OSError as e:
+                print(f"Error indexing wallpaper folder {directory}: {e}")
+                continue
+            pool = previous.get(index)
+            if pool is None or pool.directory != directory or pool.files != files:
+                pool = WallpaperPool(directory, files)
+            pools[index] = pool
+        with self.lock:
+            self.pools = pools
+            self.current = (None, "")
+        self.manifest.save()
+
+    def select(self, index):
+        with self.lock:
+            if index == self.current[0]:
+                return self.current[1]
+            pool = self.pools.get(index)
+            if pool is None:
+                path = self.wallpapers.get(index, "")
+            else:
+                path = pool.pick()
+                if self.cache is not None and pool.upcoming:
+                    self.cache.prewarm_later(pool.upcoming)
+            self.current = (index, path)
+            return path
+
+    # The image each slot's next select() returns, for pre-converting
+    def upcoming(self):
+        with self.lock:
+            return [self.pools[index].upcoming if index in self.pools else path for index, path in self.wallpapers.items()]
+
+    def describe(self, index):
+        path = self.wallpapers.get(index, "")
+        if not path:
+            return "None"
+        with self.lock:
+            pool = self.pools.get(index)
+        if pool is not None:
+            return f"{os.path.basename(pool.directory)} ({len(pool.files)} images)"
+        return os.path.basename(path)
+
+# Per-stage latency samples, from SpeedRunIGT writing a split to the wallpaper
+# being applied. Times are in seconds from time.perf_counter().
+#   world:  latest_world.json notification -> new events.log armed
+#   notify: events.log notification -> evaluation started (queueing)
+#   read:   reading the newly appended bytes
+#   match:  scanning them for split keywords
+#   apply:  wallpaper requested -> applied by the backend
+#   total:  events.log notification -> wallpaper applied
+class LatencyStats:
+    STAGES = ("world", "notify", "read", "match", "apply", "total")
+
+    def __init__(self, max_samples=1000):
+        self.lock = threading.Lock()
+        self.samples = {stage: collections.deque(maxlen=max_samples) for stage in self.STAGES}
+
+    def record(self, stage, seconds):
+        with self.lock:
+            self.samples[stage].append(seconds)
+
+    def summary(self):
+        result = {}
+        with self.lock:
+            for stage, samples in self.samples.items():
+                ordered = sorted(samples)
+                if not ordered:
+                    result[stage] = {"count": 0, "p50_ms": None, "p95_ms": None, "max_ms": None}
+                    continue
+                def percentile(p):
+                    return round(ordered[min(len(ordered) - 1, int(p * len(ordered)))] * 1000, 3)
+                result[stage] = {"count": len(ordered), "p50_ms": percentile(0.5), "p95_ms": percentile(0.95), "max_ms": round(ordered[-1] * 1000, 3)}
+        return result
+
+    def format_table(self):
+        lines = [f"{'stage':<8}{'count':>8}{'p50 ms':>12}{'p95 ms':>12}{'max ms':>12}"]
+        for stage, row in self.summary().items():
+            values = [f"{row[key]:.3f}" if row[key] is not None else "-" for key in ("p50_ms", "p95_ms", "max_ms")]
+            lines.append(f"{stage:<8}{row['count']:>8}{values[0]:>12}{values[1]:>12}{values[2]:>12}")
+        return "\n".join(lines)
+
+    def export(self, path):
+        with open(path, "w") as file:
+            json.dump({"exported_at": time.time(), "stages": self.summary()}, file, indent=2)
+
+# Formats a millisecond time as m:ss for tables
+def format_time_ms(ms):
+    if ms is None:
+        return "-"
+    seconds = int(ms // 1000)
+    return f"{seconds // 60}:{seconds % 60:02d}"
+
+# Append-only history of every event SpeedRunIGT logged, kept in SQLite. The
+# split path only queues the text it already read; a writer thread parses it
+# and inserts it in batches. Per-split rollups (worlds that reached the split
+# and a histogram of their in-game time to it) are updated as rows go in, so
+# reading them costs the same with ten worlds or fifty thousand. A worlds row
+# is one run: a world folder that is recreated, or whose events.log is
+# replaced or truncated, gets a new row rather than being counted twice.
+class RunHistory:
+    BUCKET_MS = 10000  # Width of a time-to-split histogram bucket
+    WORLDS_TABLE = """
+        CREATE TABLE IF NOT EXISTS {name} (
+            id INTEGER PRIMARY KEY,
+            path TEXT NOT NULL,
+            first_seen REAL NOT NULL,
+            file_id TEXT,
+            ingested_bytes INTEGER NOT NULL DEFAULT 0
+        );
+    """
+    SCHEMA = WORLDS_TABLE.format(name="worlds") + """
+        CREATE INDEX IF NOT EXISTS worlds_by_path ON worlds(path, id);
+        CREATE TABLE IF NOT EXISTS events (
+            world_id INTEGER NOT NULL REFERENCES worlds(id),
+            event TEXT NOT NULL,
+            rta_ms INTEGER,
+            igt_ms INTEGER,
+            recorded_at REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS events_by_world ON events(world_id);
+        CREATE INDEX IF NOT EXISTS events_by_event ON events(event);
+        CREATE TABLE IF NOT EXISTS reached (
+            world_id INTEGER NOT NULL REFERENCES worlds(id),
+            event TEXT NOT NULL,
+            rta_ms INTEGER,
+            igt_ms INTEGER,
+            PRIMARY KEY (world_id, event)
+        );
+        CREATE INDEX IF NOT EXISTS reached_by_event ON reached(event, igt_ms);
+        CREATE TABLE IF NOT EXISTS split_rollup (
+            event TEXT PRIMARY KEY,
+            worlds INTEGER NOT NULL,
+            timed INTEGER NOT NULL,
+            igt_total_ms INTEGER NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS split_histogram (
+            event TEXT NOT NULL,
+            bucket INTEGER NOT NULL,
+            count INTEGER NOT NULL,
+            PRIMARY KEY (event, bucket)
+        );
+    """
+
+    def __init__(self, path="history.sqlite3", flush_interval=1.0):
+        self.path = path
+        self.flush_interval = flush_interval  # How long the writer gathers a batch
+        self.queue = queue.SimpleQueue()
+        self.ingested = 0  # Event lines written
+        connection = self.connect()
+        try:
+            connection.execute("PRAGMA journal_mode=WAL")  # The History tab can read while the writer writes
+            self.migrate(connection)
+            connection.executescript(self.SCHEMA)
+        finally:
+            connection.close()
+        self.thread = threading.Thread(target=self._run, name="RunHistory", daemon=True)
+        self.thread.start()
+        atexit.register(self.close)
+
+    def connect(self):
+        return sqlite3.connect(self.path, timeout=5)
+
+    # Older databases kept one worlds row per path (path UNIQUE, maybe without
+    # file_id); rebuild that table so a path can have a row per run
+    def migrate(self, connection):
+        row = connection.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'worlds'").fetchone()
+        if row is None or "UNIQUE" not in row[0]:
+            return
+        columns = [column[1] for column in connection.execute("PRAGMA table_info(worlds)")]
+        file_id = "file_id" if "file_id" in columns else "NULL"
+        connection.executescript(
+            "BEGIN;"
+            + self.WORLDS_TABLE.format(name="worlds_by_run")
+            + f"INSERT INTO worlds_by_run (id, path, first_seen, file_id, ingested_bytes) SELECT id, path, first_seen, {file_id}, ingested_bytes FROM worlds;"
+            "DROP TABLE worlds;"
+            "ALTER TABLE worlds_by_run RENAME TO worlds;"
+            "COMMIT;")
+
+    # Called on the split path with the raw bytes of complete lines read from
+    # events.log. file_id is the log's (st_dev, st_ino) and start_offset the
+    # byte offset data starts at, so data that was ingested before is skipped
+    # after a restart, while a replaced or truncated log is ingested again.
+    def record(self, events_log_path, file_id, start_offset, data):
+        file_id = "%d:%d" % file_id if file_id is not None else None
+        self.queue.put((os.path.dirname(os.path.dirname(events_log_path)), file_id, start_offset, data, time.time()))
+
+    # Write what is queued and stop the writer; safe to call more than once
+    def close(self):
+        if self.thread.is_alive():
+            self.queue.put(None)
+            self.thread.join()
+
+    def _run(self):
+        connection = self.connect()
+        stopping = False
+        while not stopping:
+            item = self.queue.get()
+            batch = []
+            deadline = time.monotonic() + self.flush_interval
+            while item is not None:
+                batch.append(item)
+                wait = deadline - time.monotonic()
+                if wait <= 0:
+                    break
+                try:
+                    item = self.queue.get(timeout=wait)
+                except queue.Empty:
+                    break
+            stopping = item is None
+            if not batch:
+                continue
+            try:
+                with connection:
+                    for world_path, file_id, start_offset, data, recorded_at in batch:
+                        self._ingest(connection, world_path, file_id, start_offset, data, recorded_at)
+            except sqlite3.Error as e:
+                print(f"Error writing run history: {e}")
+        connection.close()
+
+    def _ingest(self, connection, world_path, file_id, start_offset, data, recorded_at):
+        end_offset = start_offset + len(data)
+        row = connection.execute("SELECT id, file_id, ingested_bytes FROM worlds WHERE path = ? ORDER BY id DESC LIMIT 1", (world_path,)).fetchone()
+        if row is not None:
+            world_id, ingested_file_id, ingested_bytes = row
+            # A recreated world or a replaced or truncated events.log is a new run
+            if (ingested_file_id is not None and file_id != ingested_file_id) or end_offset < ingested_bytes:
+                row = None
+        if row is None:
+            world_id = connection.execute("INSERT INTO worlds (path, first_seen, file_id) VALUES (?, ?, ?)", (world_path, recorded_at, file_id)).lastrowid
+            ingested_bytes = 0
+        if end_offset <= ingested_bytes:
+            return
+        if start_offset < ingested_bytes:
+            data = data[ingested_bytes - start_offset:]
+        rows = []
+        for line in data.decode("utf-8", errors="replace").splitlines():
+            parts = line.split()
+            if not parts:
+                continue
+            rta_ms = int(parts[1]) if len(parts) > 1 and parts[1].isdigit() else None
+            igt_ms = int(parts[2]) if len(parts) > 2 and parts[2].isdigit() else None
+            rows.append((world_id, parts[0], rta_ms, igt_ms, recorded_at))
+        connection.executemany("INSERT INTO events (world_id, event, rta_ms, igt_ms, recorded_at) VALUES (?, ?, ?, ?, ?)", rows)
+        for _, event, rta_ms, igt_ms, _ in rows:
+            # Only the first time a world reaches a split counts towards the rollups
+            if not connection.execute("INSERT OR IGNORE INTO reached (world_id, event, rta_ms, igt_ms) VALUES (?, ?, ?, ?)", (world_id, event, rta_ms, igt_ms)).rowcount:
+                continue
+            connection.execute(
+                "INSERT INTO split_rollup (event, worlds, timed, igt_total_ms) VALUES (?, 1, ?, ?) "
+                "ON CONFLICT(event) DO UPDATE SET worlds = worlds + 1, timed = timed + excluded.timed, igt_total_ms = igt_total_ms + excluded.igt_total_ms",
+                (event, int(igt_ms is not None), igt_ms or 0))
+            if igt_ms is not None:
+                connection.execute(
+                    "INSERT INTO split_histogram (event, bucket, count) VALUES (?, ?, 1) "
+                    "ON CONFLICT(event, bucket) DO UPDATE SET count = count + 1",
+                    (event, igt_ms // self.BUCKET_MS))
+        connection.execute("UPDATE worlds SET file_id = ?, ingested_bytes = ? WHERE id = ?", (file_id, end_offset, world_id))
+        self.ingested += len(rows)
+
+    # Reach counts, split rates and in-game time to each split, read from the
+    # rollup tables only. Percentiles are the upper edge of their histogram bucket.
+    def summary(self):
+        connection = self.connect()
+        try:
+            worlds = connection.execute("SELECT COUNT(*) FROM worlds").fetchone()[0]
+            histograms = collections.defaultdict(list)
+            for event, bucket, count in connection.execute("SELECT event, bucket, count FROM split_histogram ORDER BY event, bucket"):
+                histograms[event].append((bucket * self.BUCKET_MS, count))
+            splits = {}
+            for event, reached, timed, igt_total_ms in connection.execute("SELECT event, worlds, timed, igt_total_ms FROM split_rollup ORDER BY worlds DESC, event"):
+                histogram = histograms.get(event, [])
+                splits[event] = {
+                    "worlds": reached,
+                    "rate": reached / worlds if worlds else 0.0,
+                    "mean_igt_ms": igt_total_ms / timed if timed else None,
+                    "p50_igt_ms": self.percentile(histogram, timed, 0.5),
+                    "p90_igt_ms": self.percentile(histogram, timed, 0.9),
+                    "histogram": histogram,
+                }
+            return {"worlds": worlds, "splits": splits}
+        finally:
+            connection.close()
+
+    def percentile(self, histogram, total, fraction):
+        seen = 0
+        for bucket_start, count in histogram:
+            seen += count
+            if seen >= total * fraction:
+                return bucket_start + self.BUCKET_MS
+        return None
+
+    def format_table(self):
+        summary = self.summary()
+        lines = [f"Worlds recorded: {summary['worlds']}", "", f"{'split':<28}{'worlds':>8}{'rate':>8}{'mean':>8}{'p50':>8}{'p90':>8}"]
+        for event, row in summary["splits"].items():
+            times = [format_time_ms(row[key]) for key in ("mean_igt_ms", "p50_igt_ms", "p90_igt_ms")]
+            lines.append(f"{event:<28}{row['worlds']:>8}{row['rate']:>8.1%}{times[0]:>8}{times[1]:>8}{times[2]:>8}")
+        return "\n".join(lines)
+
+def create_run_history(path):
+    try:
+        return RunHistory(path)
+    except sqlite3.Error as e:
+        print(f"Run history disabled, could not open {path}: {e}")
+        return None
+
+# Applies wallpapers on its own thread. Requests are latest-wins: anything that
+# arrives while an apply is in flight replaces the previous pending request.
+# An image already on screen (same path and mtime) is not applied again.
+class WallpaperApplier:
+    def __init__(self, backend=None, cache=None, stats=None):
+        self.backend = backend if backend is not None else default_wallpaper_backend()
+        self.cache = cache  # Optional WallpaperCache with pre-converted images
+        self.stats = stats  # Optional LatencyStats for the apply and total stages
+        self.condition = threading.Condition()
+        self.pending = None
+        self.busy = False
+        self.applied_key = None  # (path, mtime) of the wallpaper currently applied
+        self.requests = 0
+        self.superseded = 0  # Requests replaced by a newer one before being applied
+        self.skipped = 0  # Requests for the wallpaper that was already applied
+        self.applies = 0
+        self.running = False
+        self.thread = None
+
+    def start(self):
+        with self.condition:
+            if self.running:
+                return
+            self.running = True
+        self.thread = threading.Thread(target=self._run, name="WallpaperApplier", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        with self.condition:
+            self.running = False
+            self.condition.notify_all()
+        if self.thread is not None and self.thread is not threading.current_thread():
+            self.thread.join()
+        self.thread = None
+
+    # triggered_at is the perf_counter() time of the notification that led here
+    def request(self, image_path, triggered_at=None):
+        with self.condition:
+            self.requests += 1
+            if self.pending is not None:
+                self.superseded += 1
+            self.pending = (image_path, time.perf_counter(), triggered_at)
+            self.condition.notify_all()
+
+    # Block until every queued request has been handled; returns False on timeout
+    def wait_idle(self, timeout=None):
+        with self.condition:
+            return self.condition.wait_for(lambda: self.pending is None and not self.busy, timeout)
+
+    def _run(self):
+        while True:
+            with self.condition:
+                self.condition.wait_for(lambda: self.pending is not None or not self.running)
+                if not self.running:
+                    return
+                image_path, requested_at, triggered_at = self.pending
+                self.pending = None
+                self.busy = True
+            try:
+                if self._apply(image_path) and self.stats is not None:
+                    applied_at = time.perf_counter()
+                    self.stats.record("apply", applied_at - requested_at)
+                    if triggered_at is not None:
+                        self.stats.record("total", applied_at - triggered_at)
+            except Exception as e:
+                print(f"Error changing wallpaper: {e}")
+            finally:
+                with self.condition:
+                    self.busy = False
+                    self.condition.notify_all()
+
+    def _apply(self, image_path):
+        try:
+            key = (image_path, os.stat(image_path).st_mtime)
+        except OSError:
+            print(f"Wallpaper file not found: {image_path}")
+            return False
+        if key == self.applied_key:
+            self.skipped += 1
+            print(f"Wallpaper already applied, skipping: {image_path}")
+            return False
+        print(f"Attempting to change wallpaper to: {image_path}")
+        apply_path = image_path
+        if self.cache is not None:
+            cached = self.cache.lookup(image_path)
+            if cached is not None:
+                print(f"Using cached wallpaper: {cached}")
+                apply_path = cached
+        if self.backend.apply(apply_path):
+            self.applied_key = key
+            self.applies += 1
+            print(f"Wallpaper changed to: {image_path}")
+            return True
+        print(f"Failed to change wallpaper to: {image_path}")
+        return False
 
 # Priority list of keywords (highest priority first)
 PRIORITY_KEYWORDS = [
@@ -30,6 +693,41 @@ PRIORITY_KEYWORDS = [
     ("enter_nether", 1)
 ]
 
+# Matches every keyword in PRIORITY_KEYWORDS with one compiled alternation, so a
+# whole buffer is scanned in a single pass no matter how many splits exist.
+class SplitMatcher:
+    def __init__(self, keywords):
+        self.priorities = {keyword: (priority, wallpaper_num) for priority, (keyword, wallpaper_num) in enumerate(keywords)}
+        # Longest keywords first so a keyword that prefixes another can't shadow it
+        alternation = "|".join(re.escape(keyword) for keyword in sorted(self.priorities, key=len, reverse=True))
+        self.pattern = re.compile(alternation)
+        self.no_match_priority = len(keywords)
+
+    # Returns (priority, event, wallpaper_num) of the best split in text, or None
+    def scan(self, text):
+        best = None
+        for match in self.pattern.finditer(text):
+            keyword = match.group()
+            priority, wallpaper_num = self.priorities[keyword]
+            if best is None or priority < best[0]:
+                best = (priority, keyword, wallpaper_num)
+                if priority == 0:
+                    break  # Nothing can outrank the top keyword
+        return best
+
+    # Bulk variant for a sequence of text chunks (lines, blocks read from disk, ...)
+    def scan_chunks(self, chunks):
+        best = None
+        for chunk in chunks:
+            found = self.scan(chunk)
+            if found is not None and (best is None or found[0] < best[0]):
+                best = found
+                if best[0] == 0:
+                    break
+        return best
+
+SPLIT_MATCHER = SplitMatcher(PRIORITY_KEYWORDS)
+
 # Mapping for wallpaper button names
 WALLPAPER_NAMES = {
     0: "Default",
@@ -42,20 +740,1054 @@ WALLPAPER_NAMES = {
     7: "Credits"
 }
 
-# Custom class to redirect stdout and stderr to a Tkinter Text widget
-class ConsoleRedirector:
-    def __init__(self, text_widget):
-        self.text_widget = text_widget
+# Incremental reader for one events.log. Remembers the byte offset and the
+# highest priority split reached so far, so each modification only decodes
+# the newly appended bytes instead of re-reading the whole file.
+class EventsLogTail:
+    def __init__(self, path):
+        self.path = path
+        self.reset()
+
+    def reset(self):
+        self.offset = 0
+        self.file_id = None
+        self.partial = b""  # Trailing bytes of a line that is not finished yet
+        self.selected_priority = SPLIT_MATCHER.no_match_priority
+        self.selected_event = None
+        self.selected_wallpaper = None
+
+    # Complete lines appended since the last read, as raw bytes
+    def read_new_data(self):
+        stat = os.stat(self.path)
+        file_id = (stat.st_dev, stat.st_ino)
+        # A different inode or a smaller file means the log was replaced or truncated
+        if self.file_id is not None and (file_id != self.file_id or stat.st_size < self.offset):
+            print(f"events.log was truncated or replaced, re-reading from the start: {self.path}")
+            self.reset()
+        self.file_id = file_id
+        if stat.st_size == self.offset:
+            return b""
+        with open(self.path, "rb") as file:
+            file.seek(self.offset)
+            data = file.read()
+        self.offset += len(data)
+        data = self.partial + data
+        end = data.rfind(b"\n") + 1
+        self.partial = data[end:]
+        return data[:end]
+
+    def read_new_text(self):
+        return self.read_new_data().decode("utf-8", errors="replace")
+
+    def update(self):
+        return self.feed(self.read_new_text())
+
+    # Update the running state from text that was appended to the log
+    def feed(self, text):
+        found = SPLIT_MATCHER.scan(text)
+        if found is not None and found[0] < self.selected_priority:
+            self.selected_priority, self.selected_event, self.selected_wallpaper = found
+        return self.selected_event, self.selected_wallpaper
+
+# Keyed debounce and timer thread. The first submission for a key runs right
+# away; submissions that arrive while it runs or within the debounce window
+# after it are merged into one trailing run. With leading=False every run waits
+# for the window to close instead (write-behind). Delayed actions run on the
+# dispatcher thread instead of sleeping on the caller's thread.
+class EventDispatcher:
+    def __init__(self, debounce=0.05, leading=True):
+        self.debounce = debounce
+        self.leading = leading
+        self.condition = threading.Condition()
+        self.tasks = []  # Heap of (due time, sequence, key, callback)
+        self.pending = set()  # Keys that already have an evaluation queued
+        self.quiet_until = {}  # Key -> end of the window after its last run started
+        self.sequence = itertools.count()
+        self.notifications = 0  # Notifications received through submit()
+        self.evaluations = 0  # Evaluations actually run after coalescing
+        self.running = False
+        self.thread = None
+
+    def start(self):
+        with self.condition:
+            if self.running:
+                return
+            self.running = True
+        self.thread = threading.Thread(target=self._run, name="EventDispatcher", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        with self.condition:
+            self.running = False
+            self.tasks.clear()
+            self.pending.clear()
+            self.quiet_until.clear()
+            self.condition.notify()
+        if self.thread is not None and self.thread is not threading.current_thread():
+            self.thread.join()
+        self.thread = None
+
+    # Queue callback for key; further notifications for the same key before
+    # it runs are merged into that run.
+    def submit(self, key, callback):
+        with self.condition:
+            self.notifications += 1
+            if key in self.pending:
+                return
+            self.pending.add(key)
+            now = time.monotonic()
+            if self.leading:
+                due = max(now, self.quiet_until.pop(key, now))
+            else:
+                due = now + self.debounce
+            heapq.heappush(self.tasks, (due, next(self.sequence), key, callback))
+            self.condition.notify()
+
+    # Run callback after delay seconds without blocking the caller
+    def call_later(self, delay, callback):
+        with self.condition:
+            heapq.heappush(self.tasks, (time.monotonic() + delay, next(self.sequence), None, callback))
+            self.condition.notify()
+
+    def _run(self):
+        while True:
+            with self.condition:
+                while self.running:
+                    if self.tasks:
+                        wait = self.tasks[0][0] - time.monotonic()
+                        if wait <= 0:
+                            break
+                        self.condition.wait(wait)
+                    else:
+                        self.condition.wait()
+                if not self.running:
+                    return
+                _, _, key, callback = heapq.heappop(self.tasks)
+                if key is not None:
+                    self.pending.discard(key)
+                    self.evaluations += 1
+                    if self.leading:
+                        self.quiet_until[key] = time.monotonic() + self.debounce
+            try:
+                callback()
+            except Exception as e:
+                print(f"Error in event dispatcher: {e}")
+
+# An immutable notification posted by a watcher thread. kind is "latest_world",
+# "events_log" or "await" (a re-check for an events.log that was missing);
+# at is the time.perf_counter() of the notification.
+SplitEvent = collections.namedtuple("SplitEvent", ["kind", "path", "at"])
+
+# What the UI shows: the instance driving the wallpaper, its world, the split
+# it reached and that split's wallpaper index. Replaced, never mutated.
+SplitState = collections.namedtuple("SplitState", ["instance", "world", "event", "wallpaper"])
+
+# Central store between the watcher threads and the split logic. Watchers only
+# put SplitEvents on a queue; one consumer thread takes them in order, merges
+# whatever is queued into one event per file and hands the batch to
+# apply_batch. Nothing waits for more events: an event is applied as soon as
+# the consumer is free, and events that pile up while a batch runs form the
+# next one. All split state is owned by that thread, so the hot path takes no
+# locks and a burst of notifications reads each events.log once.
+class SplitStateStore:
+    def __init__(self, apply_batch):
+        self.apply_batch = apply_batch  # Called as apply_batch(events) on the consumer thread
+        self.queue = queue.SimpleQueue()
+        self.state = SplitState(None, None, None, None)
+        self.subscribers = []  # Called as subscriber(state) on the consumer thread
+        self.notifications = 0  # Events posted by the watchers
+        self.evaluations = 0  # Events left after merging
+        self.thread = None
+
+    def start(self):
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._run, name="SplitStateStore", daemon=True)
+            self.thread.start()
+
+    # Pending events are dropped; the consumer exits at the next batch
+    def stop(self):
+        if self.thread is not None:
+            self.queue.put(None)
+            if self.thread is not threading.current_thread():
+                self.thread.join()
+            self.thread = None
+
+    # Safe to call from any thread
+    def post(self, kind, path):
+        self.queue.put(SplitEvent(kind, path, time.perf_counter()))
+
+    def subscribe(self, callback):
+        self.subscribers.append(callback)
+
+    # Consumer thread only: replace the state and tell subscribers if it changed
+    def publish(self, state):
+        if state == self.state:
+            return
+        self.state = state
+        for callback in self.subscribers:
+            try:
+                callback(state)
+            except Exception as e:
+                print(f"Error in split state subscriber: {e}")
+
+    @staticmethod
+    def merge_key(event):
+        return (event.kind, os.path.normcase(event.path))
+
+    def _run(self):
+        while True:
+            event = self.queue.get()
+            if event is None:
+                return
+            batch = [event]
+            # Take whatever else is already queued without waiting
+            while True:
+                try:
+                    event = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                if event is None:
+                    return
+                batch.append(event)
+            # One event per file, keeping the first notification time for latency stats
+            merged = {}
+            for event in batch:
+                merged.setdefault(self.merge_key(event), event)
+            self.notifications += len(batch)
+            self.evaluations += len(merged)
+            try:
+                self.apply_batch(list(merged.values()))
+            except Exception as e:
+                print(f"Error applying split events: {e}")
+
+# Expected types of the keys in config.json; anything else fails validation
+CONFIG_SCHEMA = {
+    "latest_world_path": str,
+    "wallpapers": dict,
+    "theme": str,
+    "coins": int,
+    "instances": list,
+    "instance_policy": str,
+    "watcher": str,
+    "log_max_lines": int,
+    "log_file": str,
+    "log_file_max_kb": int,
+    "wallpaper_cache": bool,
+    "wallpaper_cache_mb": (int, float),
+    "history": bool,
+    "history_db": str,
+    "feed": bool,
+    "feed_port": int,
+}
+
+def validate_config(config):
+    if not isinstance(config, dict):
+        return False
+    for key, expected in CONFIG_SCHEMA.items():
+        if key in config and not isinstance(config[key], expected):
+            return False
+    for index, path in config.get("wallpapers", {}).items():
+        if not str(index).isdigit() or not isinstance(path, str):
+            return False
+    return True
+
+# Write-behind persistence for config.json. save() only records the latest
+# state; the file is written after a short debounce on the store's own
+# thread, via a temp file and os.replace so a crash never leaves a truncated
+# config. The previous good file is kept as a .bak copy for load() to fall
+# back on.
+class ConfigStore:
+    def __init__(self, path="config.json", delay=0.5):
+        self.path = path
+        self.backup_path = path + ".bak"
+        self.lock = threading.Lock()
+        self.write_lock = threading.Lock()
+        self.data = None
+        self.dirty = False
+        self.path_is_good = False  # Only a validated config.json may replace the backup
+        self.dispatcher = EventDispatcher(delay, leading=False)
+        self.dispatcher.start()
+        atexit.register(self.close)
+
+    def save(self, config):
+        with self.lock:
+            self.data = config
+            self.dirty = True
+        self.dispatcher.submit("flush", self.flush)
+
+    def flush(self):
+        with self.write_lock:
+            with self.lock:
+                if not self.dirty:
+                    return
+                data = self.data
+                self.dirty = False
+            try:
+                temp_path = self.path + ".tmp"
+                with open(temp_path, "w") as file:
+                    json.dump(data, file)
+                    file.flush()
+                    os.fsync(file.fileno())
+                if self.path_is_good and os.path.exists(self.path):
+                    os.replace(self.path, self.backup_path)
+                os.replace(temp_path, self.path)
+            except Exception:
+                # Keep the change for the next save() or the final flush,
+                # unless a newer one came in meanwhile
+                with self.lock:
+                    if not self.dirty:
+                        self.data = data
+                        self.dirty = True
+                raise
+            self.path_is_good = True
+        print("Config saved.")
+
+    # Final flush; safe to call more than once
+    def close(self):
+        self.dispatcher.stop()
+        try:
+            self.flush()
+        except Exception as e:
+            print(f"Error saving config: {e}")
+
+    # Returns the config dict, falling back to the backup when config.json is
+    # missing, unreadable or fails validation. None if neither is usable.
+    def load(self):
+        for path in (self.path, self.backup_path):
+            if not os.path.exists(path):
+                continue
+            try:
+                with open(path, "r") as file:
+                    config = json.load(file)
+            except (OSError, ValueError) as e:
+                print(f"Error reading {path}: {e}")
+                continue
+            if not validate_config(config):
+                print(f"Invalid config in {path}; ignoring it.")
+                continue
+            if path == self.backup_path:
+                print(f"Falling back to last good config: {path}")
+            else:
+                self.path_is_good = True
+            return config
+        return None
+
+# Replacement for stdout/stderr. Writes from any thread go into a queue and are
+# flushed to the Log tab in batches from the Tk main loop. The widget is trimmed
+# to the last max_lines lines, and everything can be mirrored to a size-rotated file.
+class LogSink:
+    def __init__(self, max_lines=1000, log_file="", log_file_max_bytes=1024 * 1024, log_file_backups=3):
+        self.queue = queue.SimpleQueue()
+        self.max_lines = max_lines
+        self.partial = ""  # Text written after the last newline, not logged to the file yet
+        self.root = None
+        self.text_widget = None
+        self.interval_ms = 100
+        self.file_logger = None
+        if log_file:
+            handler = logging.handlers.RotatingFileHandler(log_file, maxBytes=log_file_max_bytes, backupCount=log_file_backups, encoding="utf-8")
+            handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+            self.file_logger = logging.getLogger("PaceWallpapers.log")
+            self.file_logger.propagate = False
+            self.file_logger.setLevel(logging.INFO)
+            self.file_logger.addHandler(handler)
 
     def write(self, message):
-        self.text_widget.configure(state='normal')
-        self.text_widget.insert(tk.END, message)
-        self.text_widget.see(tk.END)
-        self.text_widget.configure(state='disabled')
+        self.queue.put(message)
 
     def flush(self):
         pass
 
+    # Start flushing into text_widget every interval_ms from the Tk main loop
+    def attach(self, root, text_widget, interval_ms=100):
+        self.root = root
+        self.text_widget = text_widget
+        self.interval_ms = interval_ms
+        self.root.after(self.interval_ms, self._flush_to_widget)
+
+    # Take everything queued so far; returns the combined text
+    def drain(self):
+        messages = []
+        while True:
+            try:
+                messages.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        if not messages:
+            return ""
+        text = "".join(messages)
+        if self.file_logger is not None:
+            lines = (self.partial + text).split("\n")
+            self.partial = lines.pop()
+            for line in lines:
+                self.file_logger.info(line)
+        return text
+
+    def _flush_to_widget(self):
+        try:
+            text = self.drain()
+            if text:
+                self.text_widget.configure(state='normal')
+                self.text_widget.insert(tk.END, text)
+                # Drop the oldest lines so the widget never grows past max_lines
+                line_count = int(self.text_widget.index("end-1c").split(".")[0])
+                if line_count > self.max_lines:
+                    self.text_widget.delete("1.0", f"{line_count - self.max_lines + 1}.0")
+                self.text_widget.see(tk.END)
+                self.text_widget.configure(state='disabled')
+        finally:
+            self.root.after(self.interval_ms, self._flush_to_widget)
+
+# GUI-independent split detection. Tracks the events.log of the current world
+# and decides which wallpaper should be shown; on_wallpaper(index) is called
+# with the decided wallpaper index.
+class SplitEngine:
+    def __init__(self, wallpapers, on_wallpaper=None, log=print, stats=None, history=None):
+        self.wallpapers = wallpapers
+        self.on_wallpaper = on_wallpaper
+        self.log = log
+        self.stats = stats  # Optional LatencyStats for the notify, read and match stages
+        self.history = history  # Optional RunHistory that gets every line read from events.log
+        self.notified_at = None  # First events.log notification not evaluated yet
+        self.triggered_at = None  # Notification time behind the current evaluation
+        self.events_log_path = ""
+        self.events_tail = None  # EventsLogTail for the current events.log
+        self.current_wallpaper = ""  # Track the current wallpaper
+        self.leave_world_handled = False  # Flag to avoid repeated handling of leave_world
+
+    # fresh=True starts over even if world_path was seen before: the log is
+    # read from the start and no wallpaper counts as shown yet
+    def set_world(self, world_path, fresh=False):
+        self.leave_world_handled = False
+        self.events_log_path = os.path.normpath(os.path.join(world_path, "speedrunigt", "events.log"))
+        if fresh:
+            self.events_tail = None
+            self.current_wallpaper = ""
+
+    def current_tail(self):
+        if self.events_tail is None or self.events_tail.path != self.events_log_path:
+            self.events_tail = EventsLogTail(self.events_log_path)
+        return self.events_tail
+
+    def check_events_log(self):
+        self.triggered_at, self.notified_at = self.notified_at, None
+        if self.stats is not None and self.triggered_at is not None:
+            self.stats.record("notify", time.perf_counter() - self.triggered_at)
+        if os.path.exists(self.events_log_path):
+            try:
+                tail = self.current_tail()
+                started = time.perf_counter()
+                data = tail.read_new_data()
+                text = data.decode("utf-8", errors="replace")
+                read_done = time.perf_counter()
+                if self.history is not None and data:
+                    self.history.record(self.events_log_path, tail.file_id, tail.offset - len(tail.partial) - len(data), data)
+                result = tail.feed(text)
+                if self.stats is not None:
+                    self.stats.record("read", read_done - started)
+                    self.stats.record("match", time.perf_counter() - read_done)
+                self.decide(*result)
+            except Exception as e:
+                self.log(f"Error checking events.log: {e}")
+        else:
+            self.log("Warning: events.log does not exist while checking for existing keywords!")
+
+    # Same as check_events_log, for text that didn't come from disk (replays)
+    def feed_events(self, text):
+        self.decide(*self.current_tail().feed(text))
+
+    def decide(self, selected_event, selected_wallpaper):
+        if selected_event is not None:
+            self.log(f"Detected highest priority event: {selected_event}, changing wallpaper {selected_wallpaper}")
+            if selected_event == "leave_world":
+                if not self.leave_world_handled:
+                    if self.current_wallpaper and self.current_wallpaper == self.wallpapers.get(0, ""):
+                        self.log("Wallpaper Default is already set. Skipping change to avoid loop.")
+                    else:
+                        self.apply_wallpaper(0)
+                    self.leave_world_handled = True
+                else:
+                    self.log("leave_world event already handled.")
+            else:
+                self.apply_wallpaper(selected_wallpaper)
+        else:
+            self.log("No events detected in events.log.")
+
+    def apply_wallpaper(self, index):
+        self.current_wallpaper = self.wallpapers.get(index, "")
+        if self.on_wallpaper is not None:
+            self.on_wallpaper(index)
+
+# Returns the world_path recorded in latest_world.json, or "" if there is none
+def read_latest_world(latest_world_path):
+    if not os.path.exists(latest_world_path):
+        print("latest_world.json does not exist while checking.")
+        return ""
+    try:
+        with open(latest_world_path, "r") as file:
+            world_path = json.load(file).get("world_path", "")
+    except Exception as e:
+        print(f"Error checking latest_world.json: {e}")
+        return ""
+    if not world_path:
+        print("No world_path found in latest_world.json")
+    return world_path
+
+# Accepts an instance folder (.minecraft or the instance folder around it) or
+# its saves folder and returns the saves folder
+def instance_saves_dir(path):
+    path = os.path.normpath(os.path.abspath(path))
+    for candidate in (os.path.join(path, "saves"), os.path.join(path, ".minecraft", "saves")):
+        if os.path.basename(path) != "saves" and os.path.isdir(candidate):
+            return candidate
+    return path
+
+INSTANCE_POLICIES = ("most_advanced", "most_recent")
+
+# Split state of one Minecraft instance: the engine for its current world plus
+# the wallpaper index that world has reached.
+class InstanceMonitor:
+    def __init__(self, hub, saves_dir):
+        self.hub = hub
+        self.saves_dir = saves_dir
+        parent = os.path.dirname(saves_dir)
+        if os.path.basename(parent) == ".minecraft":
+            parent = os.path.dirname(parent)
+        self.name = os.path.basename(parent) or saves_dir
+        self.engine = SplitEngine(hub.wallpapers, on_wallpaper=self.on_wallpaper, log=self.log, stats=hub.stats, history=hub.history)
+        self.index = None  # Wallpaper index reached in the current world
+        self.last_active = 0.0  # time.monotonic() of the last events.log change
+        self.await_attempt = 0  # Re-checks done for a missing events.log
+        self.retired_logs = collections.deque(maxlen=64)  # Worlds this instance has moved on from
+
+    def log(self, message):
+        print(f"[{self.name}] {message}")
+
+    # Make world_path the current world. Late events.log notifications pass
+    # explicit=False and are refused for a world that was already left, so a
+    # write to an old events.log can't switch back to it; latest_world.json
+    # changes always switch, which is how a rejoined world becomes current again.
+    def switch_world(self, world_path, explicit=True):
+        events_log_path = os.path.normpath(os.path.join(world_path, "speedrunigt", "events.log"))
+        if events_log_path == self.engine.events_log_path:
+            return True
+        if events_log_path in self.retired_logs:
+            if not explicit:
+                return False
+            self.retired_logs.remove(events_log_path)
+        if self.engine.events_log_path:
+            self.retired_logs.append(self.engine.events_log_path)
+        self.engine.set_world(world_path)
+        self.index = None
+        self.hub.world_switched(self)
+        self.log(f"Updated events.log path: {events_log_path}")
+        return True
+
+    def check(self, events_log_path):
+        world_path = os.path.dirname(os.path.dirname(events_log_path))
+        if self.switch_world(world_path, explicit=False):
+            self.engine.check_events_log()
+
+    # SpeedRunIGT may not have created events.log yet when a new world shows up.
+    # Its creation event arms the tail through the EventsLogHandler; these
+    # backed-off re-checks cover watchers that never report the creation.
+    def await_events_log(self, attempt=0):
+        events_log_path = self.engine.events_log_path
+        if os.path.exists(events_log_path):
+            if self.engine.events_tail is None or self.engine.events_tail.path != events_log_path:
+                self.log(f"events.log appeared, reading it: {events_log_path}")
+                self.engine.check_events_log()
+            return
+        self.await_attempt = attempt
+        if attempt < 8:
+            self.hub.timers.call_later(0.05 * 2 ** attempt, lambda: self.hub.store.post("await", events_log_path))
+
+    def retry_await(self, events_log_path):
+        if self.engine.events_log_path == events_log_path:
+            self.await_events_log(self.await_attempt + 1)
+
+    def on_wallpaper(self, index):
+        self.index = index
+        self.hub.instance_changed(self)
+
+# Watches any number of instances with one persistent watcher. latest_world.json
+# and every instance's saves folder are each scheduled once and stay scheduled
+# across world changes. The native Observer runs emitter threads for every
+# scheduled folder, so past NATIVE_INSTANCE_LIMIT instances the single-thread
+# PollingWatcher is used instead; every evaluation runs on the SplitStateStore's consumer
+# thread, and the policy decides which instance's split drives the wallpaper.
+class MonitorHub:
+    NATIVE_INSTANCE_LIMIT = 4
+
+    def __init__(self, wallpapers, on_wallpaper, policy="most_advanced", stats=None, watcher="native", history=None):
+        self.wallpapers = wallpapers
+        self.on_wallpaper = on_wallpaper  # Called as on_wallpaper(index, triggered_at)
+        self.policy = policy if policy in INSTANCE_POLICIES else "most_advanced"
+        self.stats = stats
+        self.history = history  # Optional RunHistory shared by every instance
+        self.watcher = watcher if watcher in WATCHERS else "native"
+        self.store = SplitStateStore(self.apply_events)
+        self.timers = EventDispatcher()  # Delayed re-checks, posted back to the store
+        self.observer = None
+        self.lock = threading.Lock()
+        self.latest_world_path = ""
+        self.instances = {}  # saves folder -> InstanceMonitor
+        self.active = None  # Instance currently driving the wallpaper
+        self.latest_instance = None  # Instance of the world in latest_world.json
+        self.latest_world_handler = LatestWorldHandler(self)
+        self.events_handler = EventsLogHandler(self)
+
+    def start(self, latest_world_path="", instance_paths=()):
+        self.latest_world_path = latest_world_path
+        self.store.start()
+        self.timers.start()
+        watcher = self.watcher
+        if watcher == "native" and len(instance_paths) > self.NATIVE_INSTANCE_LIMIT:
+            print(f"{len(instance_paths)} instances configured; using the polling watcher to avoid native watcher threads for each one.")
+            watcher = "polling"
+        self.observer = create_watcher(watcher)
+        if latest_world_path:
+            self.observer.schedule(self.latest_world_handler, os.path.dirname(os.path.abspath(latest_world_path)), recursive=False)
+        for path in instance_paths:
+            self.add_instance(path)
+        self.observer.start()
+        print(f"Watching {len(self.instances)} instance(s) with policy {self.policy} ({watcher} watcher).")
+
+    def stop(self):
+        if self.observer is not None:
+            self.observer.unschedule_all()
+            self.observer.stop()
+            self.observer.join()
+            self.observer = None
+        self.timers.stop()
+        self.store.stop()
+        with self.lock:
+            self.instances.clear()
+        self.active = None
+        self.latest_instance = None
+
+    def add_instance(self, path):
+        saves_dir = instance_saves_dir(path)
+        with self.lock:
+            instance = self.instances.get(saves_dir)
+            if instance is not None:
+                return instance
+            instance = InstanceMonitor(self, saves_dir)
+            self.instances[saves_dir] = instance
+        if self.observer is not None:
+            if os.path.isdir(saves_dir):
+                self.observer.schedule(self.events_handler, saves_dir, recursive=True)
+                print(f"Monitoring instance {instance.name}: {saves_dir}")
+            else:
+                print(f"Warning: instance saves folder does not exist: {saves_dir}")
+        return instance
+
+    def instance_for(self, path):
+        path = os.path.normcase(os.path.normpath(os.path.abspath(path)))
+        with self.lock:
+            for saves_dir, instance in self.instances.items():
+                if path.startswith(os.path.normcase(saves_dir) + os.sep):
+                    return instance
+        return None
+
+    def check_latest_world(self):
+        world_path = read_latest_world(self.latest_world_path)
+        if not world_path:
+            return False
+        instance = self.instance_for(world_path) or self.add_instance(os.path.dirname(os.path.normpath(world_path)))
+        self.latest_instance = instance
+        if not instance.switch_world(world_path):
+            return False
+        if os.path.exists(instance.engine.events_log_path):
+            instance.engine.check_events_log()
+            return True
+        instance.log(f"Waiting for events.log to be created: {instance.engine.events_log_path}")
+        instance.await_events_log()
+        return False
+
+    # The polling backend only scans the newest worlds on its own, so tell it
+    # about the world an instance is playing now
+    def world_switched(self, instance):
+        observer = self.observer
+        if isinstance(observer, PollingWatcher):
+            observer.track(instance.engine.events_log_path)
+
+    # Called from the watcher thread for every events.log change
+    def events_log_changed(self, path):
+        self.store.post("events_log", path)
+
+    # Consumer thread: apply a merged batch of SplitEvents in order, then
+    # publish the resulting state
+    def apply_events(self, events):
+        for event in events:
+            if event.kind == "latest_world":
+                if self.check_latest_world() and self.stats is not None:
+                    self.stats.record("world", time.perf_counter() - event.at)
+                continue
+            instance = self.instance_for(event.path)
+            if instance is None:
+                continue
+            if event.kind == "events_log":
+                instance.last_active = time.monotonic()
+                instance.engine.notified_at = event.at
+                instance.check(os.path.normpath(event.path))
+            elif event.kind == "await":
+                instance.retry_await(os.path.normpath(event.path))
+        self.store.publish(self.snapshot())
+
+    def snapshot(self):
+        instance = self.active or self.latest_instance
+        if instance is None:
+            return SplitState(None, None, None, None)
+        engine = instance.engine
+        tail = engine.events_tail
+        event = tail.selected_event if tail is not None and tail.path == engine.events_log_path else None
+        world = os.path.basename(os.path.dirname(os.path.dirname(engine.events_log_path))) or None
+        return SplitState(instance.name, world, event, instance.index)
+
+    def choose_instance(self):
+        with self.lock:
+            candidates = [instance for instance in self.instances.values() if instance.index is not None]
+        if not candidates:
+            return None
+        if self.policy == "most_recent":
+            return max(candidates, key=lambda instance: instance.last_active)
+        # Highest wallpaper index is the furthest split; leave_world counts as 0
+        return max(candidates, key=lambda instance: (instance.index, instance.last_active))
+
+    def instance_changed(self, instance):
+        chosen = self.choose_instance()
+        if chosen is None:
+            return
+        if chosen is not self.active and len(self.instances) > 1:
+            print(f"Instance {chosen.name} now drives the wallpaper ({self.policy}).")
+        self.active = chosen
+        self.on_wallpaper(chosen.index, chosen.engine.triggered_at if chosen is instance else None)
+
+# Pushes split state to local tools (OBS overlays, stat trackers) so they don't
+# each have to tail events.log. Clients connect over TCP on localhost and get
+# one JSON object per line: a "snapshot" on connect, then a "world" or "split"
+# message whenever that part of the state changes. Every client has a bounded
+# queue; a client that doesn't keep up loses its oldest messages, and the
+# detection thread never waits on a socket.
+class SplitFeedServer:
+    def __init__(self, host="127.0.0.1", port=47474, queue_size=64):
+        self.host = host
+        self.port = port
+        self.queue_size = queue_size
+        self.state = SplitState(None, None, None, None)
+        self.clients = set()  # asyncio.Queue per connected client
+        self.writers = set()  # StreamWriter per connected client, closed on stop
+        self.dropped = 0  # Messages dropped for slow clients
+        self.loop = None
+        self.server = None
+        self.thread = None
+
+    # Returns False if the port could not be opened
+    def start(self):
+        if self.thread is not None:
+            return True
+        started = threading.Event()
+        self.thread = threading.Thread(target=self._run, args=(started,), name="SplitFeedServer", daemon=True)
+        self.thread.start()
+        started.wait()
+        if self.server is None:
+            self.thread.join()
+            self.thread = None
+            return False
+        return True
+
+    def stop(self):
+        if self.thread is None:
+            return
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.thread = None
+
+    # SplitStateStore subscriber; called on the store's consumer thread
+    def publish(self, state):
+        loop = self.loop
+        if loop is not None and loop.is_running():
+            loop.call_soon_threadsafe(self._broadcast, state)
+
+    def _run(self, started):
+        global asyncio
+        import asyncio
+        self.loop = asyncio.new_event_loop()
+        try:
+            self.server = self.loop.run_until_complete(asyncio.start_server(self._serve_client, self.host, self.port))
+        except OSError as e:
+            print(f"Split feed disabled, could not listen on {self.host}:{self.port}: {e}")
+            self.loop.close()
+            self.loop = None
+            started.set()
+            return
+        print(f"Split feed listening on {self.host}:{self.port}")
+        started.set()
+        try:
+            self.loop.run_forever()
+        finally:
+            self.server.close()
+            # Closing the connections ends every client handler on its own
+            handlers = [task for task in asyncio.all_tasks(self.loop) if not task.done()]
+            for writer in list(self.writers):
+                writer.close()
+            if handlers:
+                self.loop.run_until_complete(asyncio.wait(handlers, timeout=1))
+            self.loop.close()
+            self.server = None
+
+    def message(self, kind, state):
+        return {
+            "type": kind,
+            "time": time.time(),
+            "instance": state.instance,
+            "world": state.world,
+            "split": state.event,
+            "wallpaper": state.wallpaper,
+            "wallpaper_name": WALLPAPER_NAMES.get(state.wallpaper),
+        }
+
+    def _broadcast(self, state):
+        previous, self.state = self.state, state
+        if (state.instance, state.world) != (previous.instance, previous.world):
+            kind = "world"
+        elif (state.event, state.wallpaper) != (previous.event, previous.wallpaper):
+            kind = "split"
+        else:
+            return
+        line = (json.dumps(self.message(kind, state)) + "\n").encode("utf-8")
+        for client in self.clients:
+            if client.full():
+                client.get_nowait()
+                self.dropped += 1
+            client.put_nowait(line)
+
+    async def _serve_client(self, reader, writer):
+        client = asyncio.Queue(self.queue_size)
+        client.put_nowait((json.dumps(self.message("snapshot", self.state)) + "\n").encode("utf-8"))
+        self.clients.add(client)
+        self.writers.add(writer)
+        sender = asyncio.ensure_future(self._send(client, writer))
+        try:
+            # Clients don't send anything; reading only notices the disconnect
+            while await reader.read(1024):
+                pass
+        except ConnectionError:
+            pass
+        finally:
+            self.clients.discard(client)
+            self.writers.discard(writer)
+            sender.cancel()
+            writer.close()
+
+    async def _send(self, client, writer):
+        try:
+            while True:
+                writer.write(await client.get())
+                await writer.drain()
+        except ConnectionError:
+            pass
+
+# One scheduled path of a PollingWatcher and the stat signatures seen for it
+class PollWatch:
+    def __init__(self, handler, path, recursive):
+        self.handler = handler
+        self.path = path
+        self.recursive = recursive
+        self.signatures = {}  # file path -> (size, mtime_ns), or None while missing
+        self.world_logs = []  # Recursive watches: events.log files of the newest worlds
+        self.current_log = None  # Recursive watches: events.log of the world being played
+        self.dir_mtime = None
+        self.primed = False  # The first poll only records a baseline
+
+    # Recursive watches are saves folders; a new world changes the folder's
+    # mtime, so the newest worlds are polled to catch it. The world being
+    # played is polled as well, however old its folder is.
+    def refresh_worlds(self, keep=2):
+        mtime = os.stat(self.path).st_mtime_ns
+        if mtime == self.dir_mtime:
+            return
+        self.dir_mtime = mtime
+        worlds = [entry for entry in os.scandir(self.path) if entry.is_dir()]
+        worlds.sort(key=lambda entry: entry.stat().st_mtime_ns, reverse=True)
+        self.world_logs = [os.path.normpath(os.path.join(entry.path, "speedrunigt", "events.log")) for entry in worlds[:keep]]
+
+    # Returns (path, created) for files whose size or mtime changed since the
+    # previous poll; created is True when the file didn't exist before
+    def poll(self):
+        if self.recursive:
+            self.refresh_worlds()
+            paths = self.world_logs
+            current_log = self.current_log
+            if current_log is not None and current_log not in paths:
+                paths = paths + [current_log]
+        else:
+            paths = [entry.path for entry in os.scandir(self.path) if entry.is_file()]
+        changed = []
+        signatures = {}
+        for path in paths:
+            try:
+                stat = os.stat(path)
+                signature = (stat.st_size, stat.st_mtime_ns)
+            except OSError:
+                signature = None
+            signatures[path] = signature
+            previous = self.signatures.get(path)
+            if signature is not None and signature != previous and (self.primed or path in self.signatures):
+                changed.append((path, previous is None))
+        self.signatures = signatures
+        self.primed = True
+        return changed
+
+# Stat-based replacement for the native watchdog Observer, for synced or
+# network folders where native notifications get lost or duplicated. One
+# thread compares size/mtime on an adaptive interval: min_interval right after
+# activity, backing off towards max_interval while idle. Changes reach the
+# same handlers as FileModifiedEvents.
+class PollingWatcher:
+    def __init__(self, min_interval=0.02, max_interval=0.5, backoff=1.5):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.interval = min_interval
+        self.lock = threading.Lock()
+        self.watches = []
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.polls = 0
+
+    def schedule(self, handler, path, recursive=False):
+        with self.lock:
+            self.watches.append(PollWatch(handler, path, recursive))
+
+    def unschedule_all(self):
+        with self.lock:
+            self.watches.clear()
+
+    # Always poll events_log_path, the log of the world an instance switched to
+    def track(self, events_log_path):
+        folder = os.path.normcase(events_log_path)
+        with self.lock:
+            for watch in self.watches:
+                if watch.recursive and folder.startswith(os.path.normcase(os.path.normpath(watch.path)) + os.sep):
+                    watch.current_log = events_log_path
+
+    def start(self):
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self._run, name="PollingWatcher", daemon=True)
+        self.thread.start()
+
+    def is_alive(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def stop(self):
+        self.stop_event.set()
+
+    def join(self, timeout=None):
+        if self.thread is not None:
+            self.thread.join(timeout)
+
+    def _run(self):
+        while not self.stop_event.wait(self.interval):
+            if self.poll():
+                self.interval = self.min_interval
+            else:
+                self.interval = min(self.max_interval, self.interval * self.backoff)
+
+    def poll(self):
+        self.polls += 1
+        with self.lock:
+            watches = list(self.watches)
+        changed = False
+        for watch in watches:
+            try:
+                paths = watch.poll()
+            except OSError as e:
+                print(f"Error polling {watch.path}: {e}")
+                continue
+            for path, created in paths:
+                changed = True
+                try:
+                    watch.handler.dispatch(FileCreatedEvent(path) if created else FileModifiedEvent(path))
+                except Exception as e:
+                    print(f"Error handling change in {path}: {e}")
+        return changed
+
+WATCHERS = ("native", "polling")
+
+def create_watcher(kind):
+    if kind == "polling":
+        return PollingWatcher()
+    return Observer()
+
+# Measures one watcher backend: latency from appending to events.log until the
+# handler sees it, plus process CPU time while writing and while idle
+def measure_watcher(kind, writes=50, interval=0.05, idle=2.0):
+    root = tempfile.mkdtemp(prefix="pacepapers-watch-")
+    saves_dir = os.path.join(root, "saves")
+    events_log_path = os.path.join(saves_dir, "world", "speedrunigt", "events.log")
+    os.makedirs(os.path.dirname(events_log_path))
+    open(events_log_path, "w").close()
+    detected = threading.Event()
+
+    class Probe(FileSystemEventHandler):
+        def on_modified(self, event):
+            if os.path.basename(event.src_path) == "events.log":
+                detected.set()
+
+    watcher = create_watcher(kind)
+    watcher.schedule(Probe(), saves_dir, recursive=True)
+    watcher.start()
+    latencies = []
+    missed = 0
+    try:
+        time.sleep(0.5)  # Let the watcher settle and take its baseline
+        cpu_start = time.process_time()
+        for number in range(writes):
+            detected.clear()
+            written_at = time.perf_counter()
+            with open(events_log_path, "a") as file:
+                file.write(f"rsg.enter_nether {number} {number}\n")
+            if detected.wait(2):
+                latencies.append(time.perf_counter() - written_at)
+            else:
+                missed += 1
+            time.sleep(interval)
+        active_cpu = time.process_time() - cpu_start
+        cpu_start = time.process_time()
+        time.sleep(idle)
+        idle_cpu = time.process_time() - cpu_start
+    finally:
+        watcher.stop()
+        watcher.join()
+        shutil.rmtree(root, ignore_errors=True)
+    latencies.sort()
+    def percentile(p):
+        return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000, 3) if latencies else None
+    return {
+        "watcher": kind,
+        "writes": writes,
+        "missed": missed,
+        "latency_p50_ms": percentile(0.5),
+        "latency_p95_ms": percentile(0.95),
+        "latency_max_ms": round(latencies[-1] * 1000, 3) if latencies else None,
+        "cpu_ms_while_writing": round(active_cpu * 1000, 3),
+        "cpu_ms_per_idle_second": round(idle_cpu * 1000 / idle, 3),
+    }
+
+def compare_watchers_main(args):
+    results = [measure_watcher(kind, args.writes, args.interval) for kind in WATCHERS]
+    if args.json:
+        json.dump(results, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+        return 0
+    print(f"{'watcher':<10}{'missed':>8}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}{'cpu ms':>10}{'idle cpu ms/s':>15}")
+    for row in results:
+        latency = [f"{row[key]:.2f}" if row[key] is not None else "-" for key in ("latency_p50_ms", "latency_p95_ms", "latency_max_ms")]
+        print(f"{row['watcher']:<10}{row['missed']:>8}{latency[0]:>10}{latency[1]:>10}{latency[2]:>10}{row['cpu_ms_while_writing']:>10.1f}{row['cpu_ms_per_idle_second']:>15.2f}")
+    return 0
+
 # GUI Application
 class PaceWallpapersApp:
     def __init__(self, root):
@@ -67,14 +1799,23 @@ class PaceWallpapersApp:
         self.dark_mode = False
         
         self.config_file = "config.json"
+        self.config_store = ConfigStore(self.config_file)
         self.latest_world_path = ""
-        # No default events.log path; it will be set from latest_world.json.
-        self.events_log_path = ""
         self.wallpapers = {i: "" for i in range(8)}
-        self.current_wallpaper = ""  # Track the current wallpaper
-        self.leave_world_handled = False  # Flag to avoid repeated handling of leave_world
         self.theme = "light"  # "light", "dark", or "orange"
         self.coins = 0  # Coin counter
+        self.instances = []  # Extra instance folders watched alongside latest_world.json
+        self.instance_policy = "most_advanced"  # Which instance's split drives the wallpaper
+        self.watcher = "native"  # "native" watchdog observer, or "polling" for synced/network folders
+        self.log_max_lines = 1000  # Scrollback kept in the Log tab
+        self.log_file = ""  # Optional file that mirrors the Log tab
+        self.log_file_max_kb = 1024
+        self.wallpaper_cache_enabled = True  # Pre-convert wallpapers to BMP at display resolution
+        self.wallpaper_cache_mb = 256
+        self.history_enabled = True  # Record every run in a SQLite database for the History tab
+        self.history_db = "history.sqlite3"
+        self.feed_enabled = False  # Serve split changes to overlays on localhost
+        self.feed_port = 47474
         self.load_config()
         
         # Spoingus toggle state and storage for original theme
@@ -87,17 +1828,23 @@ class PaceWallpapersApp:
         self.main_frame = ttk.Frame(self.notebook)
         self.wallpapers_frame = ttk.Frame(self.notebook)
         self.log_frame = ttk.Frame(self.notebook)
+        self.stats_frame = ttk.Frame(self.notebook)
+        self.history_frame = ttk.Frame(self.notebook)
         
         self.notebook.add(self.main_frame, text="Main")
         self.notebook.add(self.wallpapers_frame, text="Wallpapers")
         self.notebook.add(self.log_frame, text="Log")
+        self.notebook.add(self.stats_frame, text="Stats")
+        self.notebook.add(self.history_frame, text="History")
         self.notebook.pack(expand=True, fill="both")
         
         # Log Tab: A scrolled text widget for console output
         self.log_text = scrolledtext.ScrolledText(self.log_frame, state='disabled', wrap='word', height=15)
         self.log_text.pack(expand=True, fill="both", padx=5, pady=5)
-        sys.stdout = ConsoleRedirector(self.log_text)
-        sys.stderr = ConsoleRedirector(self.log_text)
+        self.log_sink = LogSink(self.log_max_lines, self.log_file, self.log_file_max_kb * 1024)
+        self.log_sink.attach(self.root, self.log_text)
+        sys.stdout = self.log_sink
+        sys.stderr = self.log_sink
         
         if self.theme == "dark":
             self.dark_mode = True
@@ -113,12 +1860,20 @@ class PaceWallpapersApp:
         ttk.Button(main_top_frame, text="Select latest_world.json", command=self.select_latest_world).pack(side="left", padx=5)
         self.json_path_label = ttk.Label(main_top_frame, text=self.latest_world_path if self.latest_world_path else "No JSON selected", width=40)
         self.json_path_label.pack(side="left", padx=5)
+        instances_frame = ttk.Frame(self.main_frame)
+        instances_frame.pack(fill="x")
+        ttk.Button(instances_frame, text="Add instance", command=self.add_instance).pack(side="left", padx=5)
+        ttk.Button(instances_frame, text="Clear instances", command=self.clear_instances).pack(side="left", padx=5)
+        self.instances_label = ttk.Label(instances_frame, text=f"Extra instances: {len(self.instances)}")
+        self.instances_label.pack(side="left", padx=5)
         
         # Renamed buttons: "Start" and "Stop"
         self.start_button = ttk.Button(self.main_frame, text="Start", command=self.start_monitoring)
         self.start_button.pack(pady=5)
         self.stop_button = ttk.Button(self.main_frame, text="Stop", command=self.stop_monitoring)
         self.stop_button.pack(pady=5)
+        self.split_label = ttk.Label(self.main_frame, text="Split: not running")
+        self.split_label.pack(pady=5)
         ttk.Button(self.main_frame, text="Toggle Dark Theme", command=self.toggle_theme).pack(pady=5)
         # Spoingus toggle button
         self.spoingus_button = ttk.Button(self.main_frame, text="Spoingus", command=self.spoingus_action)
@@ -144,13 +1899,49 @@ class PaceWallpapersApp:
             frame = ttk.Frame(self.wallpapers_frame)
             frame.pack(pady=2, fill="x")
             ttk.Button(frame, text=f"Select {WALLPAPER_NAMES.get(i, 'Wallpaper ' + str(i))}", command=lambda n=i: self.select_wallpaper(n)).pack(side="left", padx=5)
+            ttk.Button(frame, text="Folder", command=lambda n=i: self.select_wallpaper_folder(n)).pack(side="left", padx=5)
             lbl = ttk.Label(frame, text=os.path.basename(self.wallpapers.get(i, "")) if self.wallpapers.get(i, "") else "None", width=40)
             lbl.pack(side="left", padx=5)
             self.wallpaper_labels[i] = lbl
         
-        self.observer = Observer()
-        self.latest_world_handler = LatestWorldHandler(self)
-        self.events_handler = EventsLogHandler(self)
+        # Stats Tab: per-stage latency from log append to wallpaper applied
+        self.stats_text = tk.Text(self.stats_frame, state='disabled', height=10, font=("Courier", 10))
+        self.stats_text.pack(expand=True, fill="both", padx=5, pady=5)
+        ttk.Button(self.stats_frame, text="Export JSON", command=self.export_stats).pack(pady=5)
+        
+        # History Tab: reach counts, split rates and time to each split over every recorded world
+        self.history_text = tk.Text(self.history_frame, state='disabled', height=10, font=("Courier", 10))
+        self.history_text.pack(expand=True, fill="both", padx=5, pady=5)
+        ttk.Button(self.history_frame, text="Refresh", command=self.refresh_history).pack(pady=5)
+        self.notebook.bind("<<NotebookTabChanged>>", lambda event: self.refresh_history())
+        
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        
+        self.wallpaper_cache = None
+        if self.wallpaper_cache_enabled:
+            resolution = screen_resolution() or (self.root.winfo_screenwidth(), self.root.winfo_screenheight())
+            self.wallpaper_cache = create_wallpaper_cache(self.wallpaper_cache_mb, resolution)
+        self.latency_stats = LatencyStats()
+        self.run_history = create_run_history(self.history_db) if self.history_enabled else None
+        self.wallpaper_applier = WallpaperApplier(cache=self.wallpaper_cache, stats=self.latency_stats)
+        self.wallpaper_applier.start()
+        self.wallpaper_selector = WallpaperSelector(self.wallpapers, cache=self.wallpaper_cache)
+        self.wallpaper_selector.load()
+        self.update_wallpaper_labels()
+        self.prewarm_wallpapers()
+        # No default events.log path; each instance picks it up from latest_world.json or its saves folder.
+        self.monitor = MonitorHub(self.wallpapers, self.apply_wallpaper, self.instance_policy, self.latency_stats, self.watcher, self.run_history)
+        # The store publishes from its own thread; the Tk loop picks states up in batches
+        self.state_updates = queue.SimpleQueue()
+        self.monitor.store.subscribe(self.state_updates.put)
+        self.split_feed = None
+        if self.feed_enabled:
+            self.split_feed = SplitFeedServer(port=self.feed_port)
+            if self.split_feed.start():
+                self.monitor.store.subscribe(self.split_feed.publish)
+        self.flush_split_state()
+        self.refresh_stats()
+        print(f"GUI ready {elapsed_since_launch_ms():.0f} ms after launch.")
     
     def set_dark_theme(self):
         self.style.theme_use("clam")
@@ -252,199 +2043,430 @@ class PaceWallpapersApp:
             self.json_path_label.config(text=file_path)
             self.save_config()
     
+    def add_instance(self):
+        folder = filedialog.askdirectory(title="Select an instance folder (.minecraft or saves)")
+        if folder and folder not in self.instances:
+            self.instances.append(folder)
+            print(f"Added instance: {folder}")
+            self.instances_label.config(text=f"Extra instances: {len(self.instances)}")
+            if self.monitor.observer is not None:
+                self.monitor.add_instance(folder)
+            self.save_config()
+    
+    def clear_instances(self):
+        self.instances = []
+        print("Cleared extra instances; they stop being watched after the next Stop.")
+        self.instances_label.config(text="Extra instances: 0")
+        self.save_config()
+    
     def start_monitoring(self):
-        if not self.latest_world_path:
+        if not self.latest_world_path and not self.instances:
             print("Error: No latest_world.json selected.")
             return
-        if not os.path.exists(self.latest_world_path):
+        if self.latest_world_path and not os.path.exists(self.latest_world_path):
             print("Error: latest_world.json does not exist.")
             return
+        if self.monitor.observer is not None:
+            print("Monitoring is already running.")
+            return
         
         print(f"Starting monitoring latest_world.json at {self.latest_world_path}...")
-        self.observer.unschedule_all()
-        self.observer.schedule(self.latest_world_handler, os.path.dirname(self.latest_world_path), recursive=False)
         try:
-            if not self.observer.is_alive():
-                print("Observer not alive; starting observer.")
-                self.observer.start()
-            else:
-                print("Observer is already running.")
+            self.monitor.start(self.latest_world_path, self.instances)
         except Exception as e:
             print(f"Error starting observer: {e}")
-        self.leave_world_handled = False
        
     def stop_monitoring(self):
         print("Stopping monitoring...")
         try:
-            print("Setting wallpaper to Default before stopping monitoring.")
-            set_wallpaper(self.wallpapers.get(0, ""))
-            self.current_wallpaper = self.wallpapers.get(0, "")
+            # Stop the hub first so no split evaluated on its consumer thread
+            # can replace the Default request or select() concurrently
+            self.monitor.stop()
+            print("Setting wallpaper to Default after stopping monitoring.")
+            self.apply_wallpaper(0)
             
-            self.observer.unschedule_all()
-            self.observer.stop()
-            self.observer.join()
-            self.observer = Observer()
+            print(f"Split events: {self.monitor.store.notifications} posted, {self.monitor.store.evaluations} evaluated.")
+            if self.wallpaper_cache is not None:
+                print(self.wallpaper_cache.stats())
             # Do not clear the JSON path
-            self.events_log_path = ""
             self.save_config()
             print("Monitoring successfully stopped.")
         except Exception as e:
             print(f"Error stopping observer: {e}")
     
+    def apply_wallpaper(self, index, triggered_at=None):
+        self.wallpaper_applier.request(self.wallpaper_selector.select(index), triggered_at)
+    
+    # Only the newest state of each batch is drawn
+    def flush_split_state(self):
+        state = None
+        while True:
+            try:
+                state = self.state_updates.get_nowait()
+            except queue.Empty:
+                break
+        if state is not None:
+            if state.instance is None:
+                self.split_label.config(text="Split: waiting for a world")
+            else:
+                wallpaper = WALLPAPER_NAMES.get(state.wallpaper, "none yet")
+                self.split_label.config(text=f"Split: {state.event or 'none yet'} in {state.world} ({state.instance}) - wallpaper {wallpaper}")
+        self.root.after(100, self.flush_split_state)
+    
+    def refresh_stats(self):
+        self.stats_text.configure(state='normal')
+        self.stats_text.delete("1.0", tk.END)
+        self.stats_text.insert(tk.END, self.latency_stats.format_table())
+        self.stats_text.configure(state='disabled')
+        self.root.after(1000, self.refresh_stats)
+    
+    def refresh_history(self):
+        if self.notebook.select() != str(self.history_frame):
+            return
+        if self.run_history is None:
+            text = "Run history is disabled (set \"history\" to true in config.json)."
+        else:
+            try:
+                text = self.run_history.format_table()
+            except sqlite3.Error as e:
+                text = f"Error reading run history: {e}"
+        self.history_text.configure(state='normal')
+        self.history_text.delete("1.0", tk.END)
+        self.history_text.insert(tk.END, text)
+        self.history_text.configure(state='disabled')
+    
+    def export_stats(self):
+        file_path = filedialog.asksaveasfilename(defaultextension=".json", filetypes=[["JSON files", "*.json"]])
+        if file_path:
+            self.latency_stats.export(file_path)
+            print(f"Latency stats exported to {file_path}")
+    
+    def prewarm_wallpapers(self):
+        if self.wallpaper_cache is None:
+            return
+        self.wallpaper_cache.prewarm(self.wallpaper_selector.upcoming())
+    
+    def update_wallpaper_labels(self):
+        for index, label in self.wallpaper_labels.items():
+            label.config(text=self.wallpaper_selector.describe(index))
+    
     def select_wallpaper(self, index):
-        file_path = filedialog.askopenfilename(filetypes=[["Image files", "*.jpg;*.png;*.bmp"]])
+        file_path = filedialog.askopenfilename(filetypes=[["Image files", "*.jpg;*.jpeg;*.png;*.bmp"]])
         if file_path:
-            self.wallpapers[index] = file_path
-            self.wallpaper_labels[index].config(text=os.path.basename(file_path))
-            print(f"Selected wallpaper {WALLPAPER_NAMES.get(index, index)}: {file_path}")
-            self.save_config()
+            self.set_wallpaper(index, file_path)
+    
+    # A folder makes the split rotate through every image in it
+    def select_wallpaper_folder(self, index):
+        folder_path = filedialog.askdirectory()
+        if folder_path:
+            self.set_wallpaper(index, folder_path)
+    
+    def set_wallpaper(self, index, path):
+        self.wallpapers[index] = path
+        self.wallpaper_selector.load()
+        self.update_wallpaper_labels()
+        print(f"Selected wallpaper {WALLPAPER_NAMES.get(index, index)}: {path}")
+        self.save_config()
+        self.prewarm_wallpapers()
     
     def save_config(self):
         config = {
             "latest_world_path": self.latest_world_path,
-            "wallpapers": self.wallpapers,
+            "wallpapers": dict(self.wallpapers),
             "theme": self.theme,
-            "coins": self.coins
+            "coins": self.coins,
+            "instances": list(self.instances),
+            "instance_policy": self.instance_policy,
+            "watcher": self.watcher,
+            "log_max_lines": self.log_max_lines,
+            "log_file": self.log_file,
+            "log_file_max_kb": self.log_file_max_kb,
+            "wallpaper_cache": self.wallpaper_cache_enabled,
+            "wallpaper_cache_mb": self.wallpaper_cache_mb,
+            "history": self.history_enabled,
+            "history_db": self.history_db,
+            "feed": self.feed_enabled,
+            "feed_port": self.feed_port
         }
-        with open(self.config_file, "w") as file:
-            json.dump(config, file)
-        print("Config saved.")
+        self.config_store.save(config)
     
     def load_config(self):
-        if os.path.exists(self.config_file):
-            with open(self.config_file, "r") as file:
-                config = json.load(file)
-                self.latest_world_path = config.get("latest_world_path", "")
-                wallpapers = config.get("wallpapers", {})
-                self.wallpapers = {int(k): v for k, v in wallpapers.items()} if wallpapers else {i: "" for i in range(8)}
-                self.theme = config.get("theme", "light")
-                self.coins = config.get("coins", 0)
+        config = self.config_store.load()
+        if config is not None:
+            self.latest_world_path = config.get("latest_world_path", "")
+            wallpapers = config.get("wallpapers", {})
+            self.wallpapers = {int(k): v for k, v in wallpapers.items()} if wallpapers else {i: "" for i in range(8)}
+            self.theme = config.get("theme", "light")
+            self.coins = config.get("coins", 0)
+            self.instances = config.get("instances", [])
+            self.instance_policy = config.get("instance_policy", "most_advanced")
+            self.watcher = config.get("watcher", "native")
+            self.log_max_lines = config.get("log_max_lines", 1000)
+            self.log_file = config.get("log_file", "")
+            self.log_file_max_kb = config.get("log_file_max_kb", 1024)
+            self.wallpaper_cache_enabled = config.get("wallpaper_cache", True)
+            self.wallpaper_cache_mb = config.get("wallpaper_cache_mb", 256)
+            self.history_enabled = config.get("history", True)
+            self.history_db = config.get("history_db", "history.sqlite3")
+            self.feed_enabled = config.get("feed", False)
+            self.feed_port = config.get("feed_port", 47474)
             print("Config loaded.")
     
-    def check_latest_world(self):
-        if os.path.exists(self.latest_world_path):
-            try:
-                with open(self.latest_world_path, "r") as file:
-                    data = json.load(file)
-                    world_path = data.get("world_path", "")
-                    if world_path:
-                        new_events_log_path = os.path.normpath(os.path.join(world_path, "speedrunigt", "events.log"))
-                        self.events_log_path = new_events_log_path
-                        print(f"Checked latest_world.json: updated events.log path: {self.events_log_path}")
-                    else:
-                        print("No world_path found in latest_world.json")
-            except Exception as e:
-                print(f"Error checking latest_world.json: {e}")
-        else:
-            print("latest_world.json does not exist while checking.")
-    
-    def check_events_log(self):
-        if os.path.exists(self.events_log_path):
-            try:
-                with open(self.events_log_path, "r") as file:
-                    lines = file.readlines()
-                    selected_priority = len(PRIORITY_KEYWORDS)
-                    selected_event = None
-                    selected_wallpaper = None
-                    for line in lines:
-                        for priority, (keyword, wallpaper_num) in enumerate(PRIORITY_KEYWORDS):
-                            if keyword in line:
-                                if priority < selected_priority:
-                                    selected_priority = priority
-                                    selected_event = keyword
-                                    selected_wallpaper = wallpaper_num
-                    if selected_event is not None:
-                        print(f"Detected highest priority event: {selected_event}, changing wallpaper {selected_wallpaper}")
-                        if selected_event == "leave_world":
-                            if not self.leave_world_handled:
-                                if self.current_wallpaper and self.current_wallpaper == self.wallpapers.get(0, ""):
-                                    print("Wallpaper Default is already set. Skipping change to avoid loop.")
-                                else:
-                                    set_wallpaper(self.wallpapers.get(0, ""))
-                                    self.current_wallpaper = self.wallpapers.get(0, "")
-                                self.leave_world_handled = True
-                                print("Detected leave_world event: waiting 1 second before switching back to latest_world.json monitoring.")
-                                time.sleep(1)
-                                self.observer.unschedule_all()
-                                self.observer.schedule(self.latest_world_handler, os.path.dirname(self.latest_world_path), recursive=False)
-                            else:
-                                print("leave_world event already handled.")
-                        else:
-                            set_wallpaper(self.wallpapers.get(selected_wallpaper, ""))
-                    else:
-                        print("No events detected in events.log.")
-            except Exception as e:
-                print(f"Error checking events.log: {e}")
-        else:
-            print("Warning: events.log does not exist while checking for existing keywords!")
+    def on_close(self):
+        self.config_store.close()
+        if self.run_history is not None:
+            self.run_history.close()
+        if self.split_feed is not None:
+            self.split_feed.stop()
+        self.root.destroy()
 
 # Watchdog Handlers
 class LatestWorldHandler(FileSystemEventHandler):
-    def __init__(self, app):
-        self.app = app
+    def __init__(self, hub):
+        self.hub = hub
     
     def on_modified(self, event):
-        print(f"Detected change in latest_world.json: {event.src_path}")
-        if os.path.abspath(event.src_path) == os.path.abspath(self.app.latest_world_path):
-            try:
-                self.app.leave_world_handled = False  # Reset flag on new update
-                self.app.check_latest_world()
-                self.app.observer.unschedule_all()
-                if os.path.exists(self.app.events_log_path):
-                    self.app.observer.schedule(self.app.events_handler, os.path.dirname(self.app.events_log_path), recursive=False)
-                    print("Monitoring events.log started.")
-                else:
-                    print("Warning: events.log does not exist at the expected location!")
-            except Exception as e:
-                print(f"Unexpected error in LatestWorldHandler: {e}")
+        if os.path.abspath(event.src_path) == os.path.abspath(self.hub.latest_world_path):
+            print(f"Detected change in latest_world.json: {event.src_path}")
+            self.hub.store.post("latest_world", event.src_path)
 
+# Scheduled recursively on each instance's saves folder
 class EventsLogHandler(FileSystemEventHandler):
-    def __init__(self, app):
-        self.app = app
+    def __init__(self, hub):
+        self.hub = hub
     
     def on_modified(self, event):
         if os.path.basename(event.src_path) == "events.log":
-            print(f"Detected change in events.log: {event.src_path}")
-            try:
-                with open(self.app.events_log_path, "r") as file:
-                    lines = file.readlines()
-                    selected_priority = len(PRIORITY_KEYWORDS)
-                    selected_event = None
-                    selected_wallpaper = None
-                    for line in lines:
-                        for priority, (keyword, wallpaper_num) in enumerate(PRIORITY_KEYWORDS):
-                            if keyword in line:
-                                if priority < selected_priority:
-                                    selected_priority = priority
-                                    selected_event = keyword
-                                    selected_wallpaper = wallpaper_num
-                    if selected_event is not None:
-                        print(f"Detected highest priority event: {selected_event}, changing wallpaper {selected_wallpaper}")
-                        if selected_event == "leave_world":
-                            if not self.app.leave_world_handled:
-                                if self.app.current_wallpaper and self.app.current_wallpaper == self.app.wallpapers.get(0, ""):
-                                    print("Wallpaper Default is already set. Skipping change to avoid loop.")
-                                else:
-                                    set_wallpaper(self.app.wallpapers.get(0, ""))
-                                    self.app.current_wallpaper = self.app.wallpapers.get(0, "")
-                                self.app.leave_world_handled = True
-                                print("Detected leave_world event: waiting 1 second before switching back to latest_world.json monitoring.")
-                                time.sleep(1)
-                                self.app.observer.unschedule_all()
-                                self.app.observer.schedule(self.app.latest_world_handler, os.path.dirname(self.app.latest_world_path), recursive=False)
-                            else:
-                                print("leave_world event already handled.")
-                        else:
-                            set_wallpaper(self.app.wallpapers.get(selected_wallpaper, ""))
-                    else:
-                        print("No events detected in events.log.")
-            except Exception as e:
-                print(f"Error in EventsLogHandler: {e}")
+            self.hub.events_log_changed(event.src_path)
+    
+    # A new world's events.log is armed and read the moment it appears
+    def on_created(self, event):
+        if os.path.basename(event.src_path) == "events.log":
+            self.hub.events_log_changed(event.src_path)
+    
+    def on_moved(self, event):
+        if os.path.basename(event.dest_path) == "events.log":
+            self.hub.events_log_changed(event.dest_path)
 
-if __name__ == "__main__":
+# Headless replay: every recorded events.log is played back through a
+# SplitEngine as one world, in order, collecting the wallpaper transitions it
+# decides on.
+def find_replay_logs(paths):
+    log_paths = []
+    for path in paths:
+        if os.path.isdir(path):
+            for dirpath, dirnames, filenames in os.walk(path):
+                dirnames.sort()
+                if "events.log" in filenames:
+                    log_paths.append(os.path.join(dirpath, "events.log"))
+        elif os.path.basename(path) == "latest_world.json":
+            with open(path, "r") as file:
+                world_path = json.load(file).get("world_path", "")
+            if world_path:
+                log_paths.append(os.path.normpath(os.path.join(world_path, "speedrunigt", "events.log")))
+        else:
+            log_paths.append(path)
+    return log_paths
+
+# SpeedRunIGT lines look like "<event> <rta ms> <igt ms>"; returns the RTA or None
+def event_time_ms(line):
+    parts = line.split()
+    if len(parts) >= 2 and parts[1].isdigit():
+        return int(parts[1])
+    return None
+
+def replay_logs(log_paths, realtime=False, speed=1.0):
+    transitions = []
+    position = {"log": "", "line": 0, "time_ms": None, "wallpaper": None}
+    engine = SplitEngine({i: "" for i in range(8)}, log=lambda message: None)
+
+    def on_wallpaper(index):
+        # Repeats are only dropped within one log; each log starts a new world
+        if position["wallpaper"] == index:
+            return
+        position["wallpaper"] = index
+        transitions.append({
+            "log": position["log"],
+            "line": position["line"],
+            "time_ms": position["time_ms"],
+            "event": engine.events_tail.selected_event,
+            "wallpaper": index,
+            "name": WALLPAPER_NAMES.get(index, str(index)),
+        })
+
+    engine.on_wallpaper = on_wallpaper
+    line_count = 0
+    for log_path in log_paths:
+        try:
+            with open(log_path, "rb") as file:
+                text = file.read().decode("utf-8", errors="replace")
+        except OSError as e:
+            print(f"Skipping {log_path}: {e}", file=sys.stderr)
+            continue
+        # events.log lives in <world>/speedrunigt/
+        # Fresh every time, so replaying the same log again starts over
+        engine.set_world(os.path.dirname(os.path.dirname(os.path.abspath(log_path))), fresh=True)
+        position["log"] = log_path
+        position["wallpaper"] = None
+        previous_ms = None
+        for number, line in enumerate(text.splitlines(), 1):
+            position["line"] = number
+            position["time_ms"] = event_time_ms(line)
+            if realtime and position["time_ms"] is not None:
+                if previous_ms is not None and position["time_ms"] > previous_ms:
+                    time.sleep((position["time_ms"] - previous_ms) / 1000 / speed)
+                previous_ms = position["time_ms"]
+            engine.feed_events(line + "\n")
+            line_count += 1
+    return transitions, line_count
+
+def replay_main(args):
+    log_paths = find_replay_logs(args.paths)
+    start = time.perf_counter()
+    transitions, line_count = replay_logs(log_paths, realtime=args.realtime, speed=args.speed)
+    elapsed = time.perf_counter() - start
+    if args.json:
+        if args.json == "-":
+            json.dump(transitions, sys.stdout, indent=2)
+            sys.stdout.write("\n")
+        else:
+            with open(args.json, "w") as file:
+                json.dump(transitions, file, indent=2)
+    else:
+        for transition in transitions:
+            print(f"{transition['log']}:{transition['line']} {transition['event']} -> {transition['wallpaper']} ({transition['name']})")
+    rate = line_count / elapsed if elapsed > 0 else 0
+    print(f"Replayed {len(log_paths)} logs, {line_count} lines in {elapsed:.3f}s ({rate:.0f} lines/s), {len(transitions)} transitions.", file=sys.stderr)
+    return 0
+
+# Headless monitoring straight from config.json: no window, no tkinter, and the
+# watches are armed right after startup instead of after a Start click.
+def daemon_main(args):
+    config = ConfigStore(args.config).load()
+    if config is None:
+        print(f"Error: no usable config at {args.config}; run the GUI once to create it.", file=sys.stderr)
+        return 1
+    latest_world_path = config.get("latest_world_path", "")
+    instances = config.get("instances", [])
+    if not latest_world_path and not instances:
+        print("Error: No latest_world.json selected.", file=sys.stderr)
+        return 1
+    if latest_world_path and not os.path.exists(latest_world_path):
+        print("Error: latest_world.json does not exist.", file=sys.stderr)
+        return 1
+    wallpapers = {int(k): v for k, v in config.get("wallpapers", {}).items()}
+
+    # Worker threads print into the sink; the main thread writes it out
+    console = sys.stdout
+    log_sink = LogSink(config.get("log_max_lines", 1000), config.get("log_file", ""), config.get("log_file_max_kb", 1024) * 1024)
+    sys.stdout = log_sink
+    sys.stderr = log_sink
+
+    wallpaper_cache = None
+    if config.get("wallpaper_cache", True):
+        wallpaper_cache = create_wallpaper_cache(config.get("wallpaper_cache_mb", 256), screen_resolution())
+    wallpaper_selector = WallpaperSelector(wallpapers, cache=wallpaper_cache)
+    wallpaper_selector.load()
+    if wallpaper_cache is not None:
+        wallpaper_cache.prewarm(wallpaper_selector.upcoming())
+    latency_stats = LatencyStats()
+    run_history = create_run_history(config.get("history_db", "history.sqlite3")) if config.get("history", True) else None
+    wallpaper_applier = WallpaperApplier(cache=wallpaper_cache, stats=latency_stats)
+    wallpaper_applier.start()
+
+    def apply_wallpaper(index, triggered_at=None):
+        wallpaper_applier.request(wallpaper_selector.select(index), triggered_at)
+
+    monitor = MonitorHub(wallpapers, apply_wallpaper, config.get("instance_policy", "most_advanced"), latency_stats, config.get("watcher", "native"), run_history)
+    split_feed = None
+    if config.get("feed", False) or args.feed:
+        split_feed = SplitFeedServer(port=args.feed_port or config.get("feed_port", 47474))
+        if split_feed.start():
+            monitor.store.subscribe(split_feed.publish)
+    monitor.start(latest_world_path, instances)
+    print(f"Watching {latest_world_path or 'configured instances'}; armed {elapsed_since_launch_ms():.0f} ms after launch. Press Ctrl+C to stop.")
+    stopping = threading.Event()
+    for name in ("SIGINT", "SIGTERM", "SIGBREAK"):
+        if hasattr(signal, name):
+            signal.signal(getattr(signal, name), lambda signum, frame: stopping.set())
+    try:
+        while not stopping.wait(0.1):
+            console.write(log_sink.drain())
+            console.flush()
+        print("Stopping monitoring...")
+        monitor.stop()
+        apply_wallpaper(0)
+        wallpaper_applier.wait_idle(5)
+        print(f"Split events: {monitor.store.notifications} posted, {monitor.store.evaluations} evaluated.")
+        if wallpaper_cache is not None:
+            print(wallpaper_cache.stats())
+        print(latency_stats.format_table())
+        if run_history is not None:
+            run_history.close()
+            print(f"Run history: {run_history.ingested} events recorded in {run_history.path}.")
+        if split_feed is not None:
+            split_feed.stop()
+            print(f"Split feed: {split_feed.dropped} messages dropped for slow clients.")
+    finally:
+        sys.stdout = console
+        sys.stderr = sys.__stderr__
+        console.write(log_sink.drain())
+    return 0
+
+# Prints the split feed of a running PacePapers, one JSON object per line
+def feed_main(args):
+    global socket
+    import socket
+    try:
+        connection = socket.create_connection((args.host, args.port))
+    except OSError as e:
+        print(f"Error: could not connect to the split feed on {args.host}:{args.port}: {e}", file=sys.stderr)
+        return 1
+    try:
+        with connection, connection.makefile("r", encoding="utf-8") as lines:
+            for line in lines:
+                print(line, end="", flush=True)
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="PacePapers", description="Changes wallpapers based on your current split.")
+    subparsers = parser.add_subparsers(dest="command")
+    replay_parser = subparsers.add_parser("replay", help="replay recorded events.log files without the GUI")
+    replay_parser.add_argument("paths", nargs="+", help="events.log files, latest_world.json files or directories to search for events.log")
+    replay_parser.add_argument("--realtime", action="store_true", help="wait between events using their recorded RTA instead of running at max speed")
+    replay_parser.add_argument("--speed", type=float, default=1.0, help="playback speed multiplier for --realtime")
+    replay_parser.add_argument("--json", metavar="PATH", help="write transitions as JSON to PATH ('-' for stdout)")
+    daemon_parser = subparsers.add_parser("daemon", help="monitor headless using config.json, without the GUI")
+    daemon_parser.add_argument("--config", default="config.json", help="config file written by the GUI (default: config.json)")
+    daemon_parser.add_argument("--feed", action="store_true", help="serve the split feed even if it is off in config.json")
+    daemon_parser.add_argument("--feed-port", type=int, help="port for the split feed (default: feed_port from config.json, or 47474)")
+    feed_parser = subparsers.add_parser("feed", help="print split and world changes from a running PacePapers")
+    feed_parser.add_argument("--host", default="127.0.0.1", help="address of the split feed (default: 127.0.0.1)")
+    feed_parser.add_argument("--port", type=int, default=47474, help="port of the split feed (default: 47474)")
+    compare_parser = subparsers.add_parser("compare-watchers", help="compare detection latency and CPU cost of the native and polling watchers")
+    compare_parser.add_argument("--writes", type=int, default=50, help="number of events.log appends to time (default: 50)")
+    compare_parser.add_argument("--interval", type=float, default=0.05, help="seconds between appends (default: 0.05)")
+    compare_parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    args = parser.parse_args(argv)
+
+    if args.command == "replay":
+        return replay_main(args)
+    if args.command == "daemon":
+        return daemon_main(args)
+    if args.command == "compare-watchers":
+        return compare_watchers_main(args)
+    if args.command == "feed":
+        return feed_main(args)
+    import_tkinter()
     root = tk.Tk()
     app = PaceWallpapersApp(root)
     root.mainloop()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
 
 
 
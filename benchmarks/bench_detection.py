@@ -0,0 +1,289 @@
+import os
+import sys
+import io
+import json
+import random
+import shutil
+import argparse
+import contextlib
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import PacePapers
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+# --quick runs use smaller inputs, so they get a baseline of their own
+QUICK_BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline-quick.json")
+
+# Events SpeedRunIGT writes during a run besides the splits we care about
+FILLER_EVENTS = [
+    "common.multiplayer", "common.open_to_lan", "common.enable_cheats", "common.view_seed",
+    "rsg.obtain_iron", "rsg.obtain_lava_bucket", "rsg.obtain_crying_obsidian", "rsg.trade",
+    "rsg.obtain_blaze_rod", "rsg.obtain_ender_pearl", "rsg.eye_throw", "rsg.loot_bastion",
+]
+SPLIT_EVENTS = ["rsg.enter_nether", "rsg.enter_bastion", "rsg.enter_fortress", "rsg.first_portal", "rsg.enter_stronghold", "rsg.enter_end"]
+
+# Lines of a synthetic events.log: filler events with splits spread through
+# the run in order, RTA/IGT increasing, optionally ending with leave_world
+def generate_events_lines(count, seed=0, leave=True):
+    rng = random.Random(seed)
+    lines = []
+    rta = 0
+    split_every = max(1, count // (len(SPLIT_EVENTS) + 1))
+    splits = iter(SPLIT_EVENTS)
+    for number in range(count - 1 if leave else count):
+        rta += rng.randint(200, 5000)
+        event = next(splits, None) if number and number % split_every == 0 else None
+        lines.append(f"{event or rng.choice(FILLER_EVENTS)} {rta} {rta - rng.randint(0, 150)}\n")
+    if leave:
+        lines.append(f"common.leave_world {rta + 1000} {rta + 900}\n")
+    return lines
+
+def write_world(saves_dir, name, lines):
+    events_log_path = os.path.join(saves_dir, name, "speedrunigt", "events.log")
+    os.makedirs(os.path.dirname(events_log_path), exist_ok=True)
+    with open(events_log_path, "w") as file:
+        file.writelines(lines)
+    return events_log_path
+
+def percentiles_ms(samples):
+    if not samples:
+        return {"p50_ms": None, "p95_ms": None, "max_ms": None}
+    ordered = sorted(samples)
+    return {
+        "p50_ms": round(ordered[len(ordered) // 2] * 1000, 4),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))] * 1000, 4),
+        "max_ms": round(ordered[-1] * 1000, 4),
+    }
+
+# The nested keyword loop the matcher replaced, kept as a reference point
+def naive_scan(lines):
+    best = None
+    for line in lines:
+        for priority, (keyword, wallpaper_num) in enumerate(PacePapers.PRIORITY_KEYWORDS):
+            if keyword in line and (best is None or priority < best[0]):
+                best = (priority, keyword, wallpaper_num)
+    return best
+
+def bench_matcher(sizes):
+    results = {}
+    for size in sizes:
+        lines = generate_events_lines(size, seed=size, leave=False)
+        text = "".join(lines)
+        start = time.perf_counter()
+        PacePapers.SPLIT_MATCHER.scan(text)
+        matcher_time = time.perf_counter() - start
+        start = time.perf_counter()
+        naive_scan(lines)
+        naive_time = time.perf_counter() - start
+        results[str(size)] = {
+            "matcher_lines_per_s": round(size / matcher_time) if matcher_time else None,
+            "naive_lines_per_s": round(size / naive_time) if naive_time else None,
+        }
+    return results
+
+# Appends one line at a time to a growing events.log; with the incremental
+# tail the cost per append should stay flat however long the run gets
+def bench_tail(total_lines, sample_every):
+    root = tempfile.mkdtemp(prefix="pacepapers-bench-")
+    try:
+        events_log_path = write_world(os.path.join(root, "saves"), "world", [])
+        tail = PacePapers.EventsLogTail(events_log_path)
+        lines = generate_events_lines(total_lines, seed=1)
+        early, late = [], []
+        tracemalloc.start()
+        with open(events_log_path, "a") as file:
+            for number, line in enumerate(lines):
+                file.write(line)
+                file.flush()
+                start = time.perf_counter()
+                tail.update()
+                elapsed = time.perf_counter() - start
+                if number < sample_every:
+                    early.append(elapsed)
+                elif number >= total_lines - sample_every:
+                    late.append(elapsed)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return {"lines": total_lines, "first_appends": percentiles_ms(early), "last_appends": percentiles_ms(late), "peak_kb": round(peak / 1024, 1)}
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+def bench_replay(worlds, lines_per_world):
+    root = tempfile.mkdtemp(prefix="pacepapers-bench-")
+    try:
+        saves_dir = os.path.join(root, "saves")
+        for number in range(worlds):
+            write_world(saves_dir, f"world{number:05d}", generate_events_lines(lines_per_world, seed=number))
+        log_paths = PacePapers.find_replay_logs([saves_dir])
+        tracemalloc.start()
+        start = time.perf_counter()
+        transitions, line_count = PacePapers.replay_logs(log_paths)
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return {"worlds": worlds, "lines": line_count, "transitions": len(transitions), "lines_per_s": round(line_count / elapsed) if elapsed else None, "peak_kb": round(peak / 1024, 1)}
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+# Full pipeline against the recording backend: watcher -> state store -> engine
+# -> apply worker. Each split is appended to events.log and timed until the
+# backend records the matching wallpaper.
+def bench_pipeline(watcher, splits, interval):
+    root = tempfile.mkdtemp(prefix="pacepapers-bench-")
+    wallpapers = {}
+    for index in range(8):
+        wallpapers[index] = os.path.join(root, f"wallpaper{index}.bmp")
+        open(wallpapers[index], "wb").close()
+    backend = PacePapers.RecordingWallpaperBackend()
+    stats = PacePapers.LatencyStats()
+    applier = PacePapers.WallpaperApplier(backend, stats=stats)
+    applier.start()
+
+    def apply_wallpaper(index, triggered_at=None):
+        applier.request(wallpapers.get(index, ""), triggered_at)
+
+    hub = PacePapers.MonitorHub(wallpapers, apply_wallpaper, stats=stats, watcher=watcher)
+    saves_dir = os.path.join(root, "saves")
+    os.makedirs(saves_dir)
+    latencies = []
+    missed = 0
+    try:
+        hub.start("", [saves_dir])
+        time.sleep(0.3)
+        split_cycle = [("rsg.enter_nether", 1), ("rsg.enter_bastion", 2), ("rsg.enter_fortress", 3), ("rsg.first_portal", 4), ("rsg.enter_stronghold", 5), ("rsg.enter_end", 6)]
+        world = 0
+        events_log_path = None
+        for number in range(splits):
+            position = number % len(split_cycle)
+            if position == 0:
+                world += 1
+                events_log_path = write_world(saves_dir, f"world{world:05d}", [])
+                time.sleep(interval)
+            event, index = split_cycle[position]
+            applied_before = len(backend.applied)
+            written_at = time.perf_counter()
+            with open(events_log_path, "a") as file:
+                file.write(f"{event} {number} {number}\n")
+            deadline = written_at + 2
+            while time.perf_counter() < deadline:
+                if len(backend.applied) > applied_before and backend.applied[-1][1] == wallpapers[index]:
+                    latencies.append(backend.applied[-1][0] - written_at)
+                    break
+                time.sleep(0.0005)
+            else:
+                missed += 1
+            time.sleep(interval)
+    finally:
+        hub.stop()
+        applier.stop()
+        shutil.rmtree(root, ignore_errors=True)
+    return {"watcher": watcher, "splits": splits, "missed": missed, "latency": percentiles_ms(latencies), "stages": stats.summary()}
+
+# Rapid resets: latest_world.json is rewritten for a new world every interval
+# and the first split is written right after; counts how many first splits
+# are detected and how fast
+def bench_resets(watcher, resets, interval):
+    root = tempfile.mkdtemp(prefix="pacepapers-bench-")
+    wallpapers = {index: f"wallpaper{index}" for index in range(8)}
+    decided = []
+    saves_dir = os.path.join(root, "saves")
+    latest_world_path = os.path.join(root, "latest_world.json")
+    os.makedirs(saves_dir)
+    with open(latest_world_path, "w") as file:
+        json.dump({"world_path": ""}, file)
+    hub = PacePapers.MonitorHub(wallpapers, lambda index, triggered_at=None: decided.append((time.perf_counter(), index)), watcher=watcher)
+    latencies = []
+    missed = 0
+    try:
+        hub.start(latest_world_path, [saves_dir])
+        time.sleep(0.3)
+        for number in range(resets):
+            world_path = os.path.join(saves_dir, f"world{number:05d}")
+            os.makedirs(os.path.join(world_path, "speedrunigt"))
+            with open(latest_world_path, "w") as file:
+                json.dump({"world_path": world_path}, file)
+            decided_before = len(decided)
+            written_at = time.perf_counter()
+            write_world(saves_dir, f"world{number:05d}", ["rsg.enter_nether 1000 900\n"])
+            deadline = written_at + 2
+            while time.perf_counter() < deadline:
+                if any(index == 1 for _, index in decided[decided_before:]):
+                    latencies.append(next(at for at, index in decided[decided_before:] if index == 1) - written_at)
+                    break
+                time.sleep(0.0005)
+            else:
+                missed += 1
+            write_world(saves_dir, f"world{number:05d}", ["rsg.enter_nether 1000 900\n", "common.leave_world 2000 1900\n"])
+            time.sleep(interval)
+    finally:
+        hub.stop()
+        shutil.rmtree(root, ignore_errors=True)
+    return {"watcher": watcher, "resets": resets, "missed": missed, "first_split_latency": percentiles_ms(latencies)}
+
+def run_benchmarks(quick=False):
+    scale = 10 if quick else 1
+    results = {"python": sys.version.split()[0], "platform": sys.platform, "quick": quick}
+    # The pipeline benchmarks print through the app's logging; keep it quiet
+    with contextlib.redirect_stdout(io.StringIO()):
+        results["matcher"] = bench_matcher([10, 1000, 100000 // scale])
+        results["tail"] = bench_tail(20000 // scale, 200)
+        results["replay"] = bench_replay(2000 // scale, 60)
+        for watcher in PacePapers.WATCHERS:
+            results[f"pipeline_{watcher}"] = bench_pipeline(watcher, 12 if quick else 60, 0.06)
+            results[f"resets_{watcher}"] = bench_resets(watcher, 10 if quick else 30, 0.1)
+    return results
+
+# Flattens nested results into "a.b.c" -> number for comparisons
+def flatten(results, prefix=""):
+    flat = {}
+    for key, value in results.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, name + "."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+def print_comparison(results, baseline):
+    if results.get("quick") != baseline.get("quick"):
+        print("Warning: the baseline was recorded in a different mode (--quick or not); counts and percentiles are not comparable.")
+    current = flatten(results)
+    previous = flatten(baseline)
+    print(f"{'metric':<55}{'baseline':>14}{'current':>14}{'change':>10}")
+    for name, value in current.items():
+        before = previous.get(name)
+        change = f"{(value - before) / before * 100:+.1f}%" if before else "-"
+        print(f"{name:<55}{before if before is not None else '-':>14}{value:>14}{change:>10}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks for split detection, matching and watching.")
+    parser.add_argument("--quick", action="store_true", help="smaller inputs for a fast sanity run")
+    parser.add_argument("--save-baseline", action="store_true", help=f"store the results in {os.path.basename(BASELINE_PATH)} ({os.path.basename(QUICK_BASELINE_PATH)} with --quick)")
+    parser.add_argument("--compare", action="store_true", help="compare the results against the saved baseline")
+    parser.add_argument("--json", metavar="PATH", help="also write the results to PATH")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.quick)
+    baseline_path = QUICK_BASELINE_PATH if args.quick else BASELINE_PATH
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump(results, file, indent=2)
+    if args.compare:
+        if not os.path.exists(baseline_path):
+            print(f"No baseline at {baseline_path}; run with --save-baseline{' --quick' if args.quick else ''} first.")
+            return 1
+        with open(baseline_path, "r") as file:
+            print_comparison(results, json.load(file))
+    else:
+        print(json.dumps(results, indent=2))
+    if args.save_baseline:
+        with open(baseline_path, "w") as file:
+            json.dump(results, file, indent=2)
+        print(f"Baseline saved to {baseline_path}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())